@@ -0,0 +1,78 @@
+"""
+Benchmarks the startup of the main board software.
+Runs `src/main.py` repeatedly with the startup profiler activated (GK_PROFILE_STARTUP) and prints the duration of
+every startup phase (imports, hydra, module constructors, setups, ...).
+
+Usage: python other/benchmark_startup.py --runs 5 --config-name benchmark [--output report.json] [hydra overrides]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from pathlib import Path
+
+SRC_PATH = Path(__file__).parent.parent / "src"
+
+
+def run_once(config_name: str, overrides: list[str], report_path: Path) -> dict:
+    env = dict(os.environ, GK_PROFILE_STARTUP=str(report_path))
+    env.setdefault("GPIOZERO_PIN_FACTORY", "mock")  # Modules create their devices before the config is applied
+    t1 = time.perf_counter()
+    subprocess.run(
+        [sys.executable, "main.py", f"--config-name={config_name}", *overrides],
+        cwd=SRC_PATH, env=env, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    report = json.loads(report_path.read_text())
+    report["process"] = time.perf_counter() - t1  # Including interpreter startup and shutdown
+    return report
+
+
+def summarize(reports: list[dict]) -> dict[str, dict[str, float]]:
+    durations = defaultdict(list)
+    for report in reports:
+        durations["total"].append(report["total"])
+        durations["process"].append(report["process"])
+        for phase in report["phases"]:
+            durations[phase["name"]].append(phase["duration"])
+
+    return {
+        name: {
+            "mean": statistics.mean(values),
+            "min": min(values),
+            "max": max(values),
+            "stdev": statistics.stdev(values) if len(values) > 1 else 0.,
+        }
+        for name, values in durations.items()
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks the startup phases of main.py")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--config-name", default="benchmark")
+    parser.add_argument("--output", type=Path, default=None, help="Write summary and all reports as JSON")
+    parser.add_argument("overrides", nargs="*", help="Hydra overrides")
+    args = parser.parse_args()
+
+    reports = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for i in range(args.runs):
+            reports.append(run_once(args.config_name, args.overrides, Path(tmp) / f"profile_{i}.json"))
+            print(f"Run {i + 1}/{args.runs}: {reports[-1]['process']:.3f}s")
+
+    summary = summarize(reports)
+    print(f"{'Phase':<40} {'mean':>8} {'min':>8} {'max':>8} {'stdev':>8}")
+    for name, stats in sorted(summary.items(), key=lambda item: -item[1]["mean"]):
+        print(f"{name:<40} {stats['mean']:>8.3f} {stats['min']:>8.3f} {stats['max']:>8.3f} {stats['stdev']:>8.3f}")
+
+    if args.output is not None:
+        args.output.write_text(json.dumps({"summary": summary, "reports": reports}, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -1,6 +1,8 @@
 # Adapted from https://github.com/wallarug/CircuitPython_MPU9250
 import time
-from typing import Optional
+from typing import Optional, NamedTuple
+
+import numpy as np
 
 from apis.i2c_modules import I2C_Module
 from smbus import SMBus
@@ -10,10 +12,14 @@ try:
 except ImportError:
     import ustruct as struct
 
+_SMPLRT_DIV = 0x19
+_CONFIG = 0x1a
 _GYRO_CONFIG = 0x1b
 _ACCEL_CONFIG = 0x1c
 _ACCEL_CONFIG2 = 0x1d
+_FIFO_EN = 0x23
 _INT_PIN_CFG = 0x37
+_INT_STATUS = 0x3a
 _ACCEL_XOUT_H = 0x3b
 _ACCEL_XOUT_L = 0x3c
 _ACCEL_YOUT_H = 0x3d
@@ -28,6 +34,9 @@ _GYRO_YOUT_H = 0x45
 _GYRO_YOUT_L = 0x46
 _GYRO_ZOUT_H = 0x47
 _GYRO_ZOUT_L = 0x48
+_USER_CTRL = 0x6a
+_FIFO_COUNTH = 0x72
+_FIFO_R_W = 0x74
 _WHO_AM_I = 0x75
 
 # _ACCEL_FS_MASK = 0b00011000
@@ -60,12 +69,36 @@ _I2C_BYPASS_MASK = 0b00000010
 _I2C_BYPASS_EN = 0b00000010
 _I2C_BYPASS_DIS = 0b00000000
 
+# FIFO
+FIFO_SIZE = 512  # Bytes
+FIFO_FRAME_SIZE = 12  # Bytes per sample (accel xyz, gyro xyz)
+_FIFO_INTERNAL_RATE = 1000  # Hz with DLPF enabled
+_FIFO_EN_ACCEL_GYRO = 0b01111000
+_FIFO_MODE_NO_OVERWRITE = 0b01000000
+_DLPF_CFG_184HZ = 0b001
+_USER_CTRL_FIFO_EN = 0b01000000
+_USER_CTRL_FIFO_RST = 0b00000100
+_INT_STATUS_FIFO_OFLOW = 0b00010000
+_FIFO_CHUNK = 32 // FIFO_FRAME_SIZE * FIFO_FRAME_SIZE  # Largest block read (SMBus limit) of whole frames
+_FIFO_DTYPE = np.dtype(">i2")
+
+_VECTOR = struct.Struct(">hhh")
+_TEMPERATURE = struct.Struct(">h")
+_SNAPSHOT = struct.Struct(">hhhhhhh")  # ACCEL_XOUT_H .. GYRO_ZOUT_L
+
 SF_G = 1
 SF_M_S2 = 9.80665  # 1 g = 9.80665 m/s2 ie. standard gravity
 SF_DEG_S = 1
 SF_RAD_S = 0.017453292519943  # 1 deg/s is 0.017453292519943 rad/s
 
 
+class IMUSnapshot(NamedTuple):
+    """ Acceleration, gyro and temperature of the same sample """
+    acceleration: tuple[float, float, float]
+    gyro: tuple[float, float, float]
+    temperature: float
+
+
 class MPU6500(I2C_Module):
     """Class which provides interface to MPU6500 6-axis motion tracking device."""
 
@@ -94,6 +127,10 @@ class MPU6500(I2C_Module):
         self._gyro_sf = gyro_sf
         self._gyro_offset = gyro_offset
 
+        self.fifo_rate: Optional[float] = None
+        self.fifo_overflows = 0
+        self._fifo_buffer = bytearray(FIFO_SIZE)
+
         # Enable I2C bypass to access for MPU9250 magnetometer access.
         char = self._read_u8(_INT_PIN_CFG)
         char &= ~_I2C_BYPASS_MASK  # clear I2C bits
@@ -107,11 +144,8 @@ class MPU6500(I2C_Module):
         return values in g if constructor was provided `accel_sf=SF_M_S2`
         parameter.
         """
-        so = self._accel_so
-        sf = self._accel_sf
-
-        xyz = self._read_bytes(_ACCEL_XOUT_H, 6)
-        return tuple([value / so * sf for value in xyz])
+        xyz = self._read_struct(_ACCEL_XOUT_H, _VECTOR)
+        return self._scale_acceleration(xyz)
 
     @property
     def acceleration(self):
@@ -125,17 +159,8 @@ class MPU6500(I2C_Module):
         """
         X, Y, Z radians per second as floats.
         """
-        so = self._gyro_so
-        ox, oy, oz = self._gyro_offset
-        gyro_scale = self._gyro_sf
-
-        raw = self._read_bytes(_GYRO_XOUT_H, 6)
-
-        gyro_x = (raw[0] / gyro_scale) - ox
-        gyro_y = (raw[1] / gyro_scale) - oy
-        gyro_z = (raw[2] / gyro_scale) - oz
-
-        return (gyro_x, gyro_y, gyro_z)
+        raw = self._read_struct(_GYRO_XOUT_H, _VECTOR)
+        return self._scale_gyro(raw)
 
     @property
     def gyro(self):
@@ -149,8 +174,8 @@ class MPU6500(I2C_Module):
         """
         Die temperature in celsius as a float.
         """
-        temp = self._read_bytes(_TEMP_OUT_H, 2)
-        return ((temp - _TEMP_OFFSET) / _TEMP_SO) + _TEMP_OFFSET
+        temp, = self._read_struct(_TEMP_OUT_H, _TEMPERATURE)
+        return self._scale_temperature(temp)
 
     @property
     def temperature(self):
@@ -158,6 +183,91 @@ class MPU6500(I2C_Module):
         raw = self.read_temperature()
         return raw
 
+    def configure_fifo(self, rate: float) -> float:
+        """
+        Writes accelerometer and gyro samples at `rate` (Hz) to the FIFO. The FIFO holds FIFO_SIZE // FIFO_FRAME_SIZE
+        samples and stops (overflow) when full, so it must be drained with `read_fifo` in time.
+
+        :return Actual sample rate (1 kHz / integer divider)
+        """
+        divider = min(max(round(_FIFO_INTERNAL_RATE / rate), 1), 256)
+        with self.transaction():
+            self._write_u8(_USER_CTRL, 0)
+            self._write_u8(_CONFIG, _FIFO_MODE_NO_OVERWRITE | _DLPF_CFG_184HZ)
+            self._write_u8(_ACCEL_CONFIG2, _DLPF_CFG_184HZ)
+            self._write_u8(_SMPLRT_DIV, divider - 1)
+            self._write_u8(_FIFO_EN, _FIFO_EN_ACCEL_GYRO)
+            self.reset_fifo()
+        self.fifo_rate = _FIFO_INTERNAL_RATE / divider
+        return self.fifo_rate
+
+    def reset_fifo(self):
+        with self.transaction():
+            self._write_u8(_USER_CTRL, _USER_CTRL_FIFO_RST)
+            self._read_u8(_INT_STATUS)  # Clears overflow flag
+            self._write_u8(_USER_CTRL, _USER_CTRL_FIFO_EN)
+
+    def fifo_count(self) -> int:
+        """ Number of complete samples in the FIFO """
+        high, low = self.smbus.read_i2c_block_data(self.address, _FIFO_COUNTH, 2)
+        return ((high & 0x1f) << 8 | low) // FIFO_FRAME_SIZE
+
+    def read_fifo(self, accel: np.ndarray, gyro: np.ndarray) -> int:
+        """
+        Drains up to len(accel) samples from the FIFO into the preallocated arrays `accel` and `gyro` (shape (n, 3))
+        in the units of `read_acceleration` and `read_gyro`. After an overflow, the FIFO is reset and all samples in
+        it are discarded (the frame alignment is lost).
+
+        :return Number of samples written
+        """
+        with self.transaction():
+            if self._read_u8(_INT_STATUS) & _INT_STATUS_FIFO_OFLOW:
+                self.fifo_overflows += 1
+                self.logger.warning("FIFO overflow, resetting FIFO")
+                self.reset_fifo()
+                return 0
+
+            n = min(self.fifo_count(), len(accel), FIFO_SIZE // FIFO_FRAME_SIZE)
+            n_bytes = n * FIFO_FRAME_SIZE
+            buffer = self._fifo_buffer
+            for offset in range(0, n_bytes, _FIFO_CHUNK):
+                length = min(_FIFO_CHUNK, n_bytes - offset)
+                buffer[offset:offset + length] = bytes(
+                    self.smbus.read_i2c_block_data(self.address, _FIFO_R_W, length)
+                )
+
+        raw = np.frombuffer(buffer, dtype=_FIFO_DTYPE, count=n * FIFO_FRAME_SIZE // 2).reshape(n, 6)
+        np.multiply(raw[:, :3], self._accel_sf / self._accel_so, out=accel[:n])
+        np.divide(raw[:, 3:], self._gyro_sf, out=gyro[:n])
+        gyro[:n] -= self._gyro_offset
+        return n
+
+    def read_snapshot(self) -> IMUSnapshot:
+        """
+        Acceleration, gyro and temperature (units as `read_acceleration`, `read_gyro` and `read_temperature`) read in
+        one 14 byte transfer, so all values belong to the same sample.
+        """
+        ax, ay, az, temp, gx, gy, gz = self._read_struct(_ACCEL_XOUT_H, _SNAPSHOT)
+        return IMUSnapshot(
+            self._scale_acceleration((ax, ay, az)),
+            self._scale_gyro((gx, gy, gz)),
+            self._scale_temperature(temp),
+        )
+
+    def _scale_acceleration(self, raw: tuple[int, int, int]) -> tuple[float, float, float]:
+        so = self._accel_so
+        sf = self._accel_sf
+        return raw[0] / so * sf, raw[1] / so * sf, raw[2] / so * sf
+
+    def _scale_gyro(self, raw: tuple[int, int, int]) -> tuple[float, float, float]:
+        ox, oy, oz = self._gyro_offset
+        gyro_scale = self._gyro_sf
+        return (raw[0] / gyro_scale) - ox, (raw[1] / gyro_scale) - oy, (raw[2] / gyro_scale) - oz
+
+    @staticmethod
+    def _scale_temperature(raw: int) -> float:
+        return ((raw - _TEMP_OFFSET) / _TEMP_SO) + _TEMP_OFFSET
+
     def read_whoami(self):
         """ Value of the whoami register. """
         return self._read_u8(_WHO_AM_I)
@@ -207,17 +317,9 @@ class MPU6500(I2C_Module):
     def _read_u8(self, address):
         return self.smbus.read_byte_data(self.address, address)
 
-    def _read_bytes(self, address, count):
-        buffer = self.smbus.read_i2c_block_data(self.address, address, 8)
-        if count == 2:
-            buf = bytearray(4)
-            buf[0] = buffer[0]
-            buf[1] = buffer[1]
-            return struct.unpack(">hh", buf)[0]
-        buf = bytearray(6)
-        for i in range(count):
-            buf[i] = buffer[i]
-        return struct.unpack(">hhh", buf)
+    def _read_struct(self, address, layout: struct.Struct) -> tuple:
+        """ Reads `layout.size` registers starting at `address` in one transfer """
+        return layout.unpack(bytes(self.smbus.read_i2c_block_data(self.address, address, layout.size)))
 
     def _write_u8(self, address, val):
         return self.smbus.write_byte_data(self.address, address, val)
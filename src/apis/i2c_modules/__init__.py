@@ -1,5 +1,6 @@
 import logging
-from typing import Optional
+from contextlib import nullcontext
+from typing import Optional, ContextManager, AsyncContextManager
 
 from smbus import SMBus
 
@@ -9,3 +10,18 @@ class I2C_Module:
         self.address = address
         self.smbus = smbus or SMBus(1)
         self.logger = logging.getLogger(self.__class__.__name__)
+
+    def transaction(self) -> ContextManager:
+        """ Groups multiple transfers to this device, if the bus is shared by threads (see I2CBusArbiter.device) """
+        device = getattr(self.smbus, "device", None)
+        return device(self.address) if device is not None else nullcontext()
+
+    def async_transaction(self) -> AsyncContextManager:
+        """ Same as `transaction` for coroutines, waits for the device without blocking the event loop """
+        device = getattr(self.smbus, "async_device", None)
+        return device(self.address) if device is not None else nullcontext()
+
+
+def i2c_resource(address: int) -> str:
+    """ Resource name of an i2c device (e.g. for setup_resources) """
+    return f"i2c:0x{address:02x}"
@@ -0,0 +1,172 @@
+import asyncio
+import heapq
+import itertools
+import time
+from contextlib import contextmanager, asynccontextmanager
+from threading import Condition, Lock, RLock
+from typing import Optional, Mapping, Union, Callable, Any
+
+from smbus import SMBus
+
+from utils.utils import GKBase
+
+
+class _PriorityLock:
+    """ Lock granted to the waiting thread with the lowest priority value (FIFO for equal priorities) """
+
+    def __init__(self):
+        self._condition = Condition(Lock())
+        self._waiting: list[tuple[int, int]] = []
+        self._counter = itertools.count()
+        self._locked = False
+
+    def acquire(self, priority: int):
+        with self._condition:
+            ticket = (priority, next(self._counter))
+            heapq.heappush(self._waiting, ticket)
+            try:
+                while self._locked or self._waiting[0] != ticket:
+                    self._condition.wait()
+            except BaseException:
+                # Interrupted while waiting (e.g. KeyboardInterrupt): Do not block the threads queued behind
+                self._waiting.remove(ticket)
+                heapq.heapify(self._waiting)
+                self._condition.notify_all()
+                raise
+            heapq.heappop(self._waiting)
+            self._locked = True
+
+    def release(self):
+        with self._condition:
+            self._locked = False
+            self._condition.notify_all()
+
+
+class _DeviceStats:
+    def __init__(self):
+        self.transactions = 0
+        self.bytes = 0
+        self.errors = 0
+        self.busy_time = 0.
+        self.wait_time = 0.
+        self.max_wait_time = 0.
+
+    def status_dict(self, elapsed: float) -> dict[str, Union[int, float]]:
+        return {
+            "transactions": self.transactions,
+            "bytes": self.bytes,
+            "errors": self.errors,
+            "busy_time": self.busy_time,
+            "utilization": self.busy_time / elapsed if elapsed > 0 else 0.,
+            "mean_wait_time": self.wait_time / max(self.transactions, 1),
+            "max_wait_time": self.max_wait_time,
+        }
+
+
+class I2CBusArbiter(GKBase):
+    """
+    Wraps an SMBus, so it can be shared by all i2c drivers from multiple threads.
+    - Every transfer holds the bus exclusively. Waiting transfers are granted by priority of their address (lower
+      value first, e.g. IMU before O2), then in order of arrival.
+    - `device(address)` groups multiple transfers to one device (e.g. an MSP UART command), so they are not
+      interleaved with transfers of other threads to the same device. Other devices can use the bus in between.
+      Coroutines use `async_device`, which waits for the device without blocking the event loop.
+    - Transactions, bytes, bus time and waiting time are counted per address.
+    """
+
+    def __init__(self, smbus: SMBus, priorities: Optional[Mapping[Union[int, str], int]] = None, default_priority=10):
+        super().__init__()
+        self.smbus = smbus
+        self.priorities = {
+            int(address, 0) if isinstance(address, str) else address: priority
+            for address, priority in (priorities or {}).items()
+        }
+        self.default_priority = default_priority
+
+        self._bus_lock = _PriorityLock()
+        self._device_locks: dict[int, RLock] = {}
+        self._async_devices: set[int] = set()  # Devices held by a coroutine
+        self._lock = Lock()
+        self._stats: dict[int, _DeviceStats] = {}
+        self._start = time.perf_counter()
+
+    @contextmanager
+    def device(self, address: int):
+        with self._lock:
+            device_lock = self._device_locks.setdefault(address, RLock())
+        with device_lock:
+            yield
+
+    @asynccontextmanager
+    async def async_device(self, address: int, poll_interval: float = 0.001):
+        """
+        Same as `device` for coroutines. The device lock is reentrant per thread and all coroutines of an event loop
+        share one thread, so devices held by a coroutine are tracked separately.
+        """
+        while True:
+            with self._lock:
+                device_lock = self._device_locks.setdefault(address, RLock())
+                if address not in self._async_devices and device_lock.acquire(blocking=False):
+                    self._async_devices.add(address)
+                    break
+            await asyncio.sleep(poll_interval)
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._async_devices.discard(address)
+                device_lock.release()
+
+    def _transfer(self, address: int, n_bytes: int, function: Callable, *args) -> Any:
+        t1 = time.perf_counter()
+        t2 = None  # Set once the bus got granted
+        error = False
+        try:
+            self._bus_lock.acquire(self.priorities.get(address, self.default_priority))
+            t2 = time.perf_counter()
+            return function(address, *args)
+        except BaseException:
+            error = True
+            raise
+        finally:
+            if t2 is not None:
+                t3 = time.perf_counter()
+                self._bus_lock.release()
+                with self._lock:
+                    stats = self._stats.setdefault(address, _DeviceStats())
+                    stats.transactions += 1
+                    stats.bytes += n_bytes
+                    stats.errors += error
+                    stats.busy_time += t3 - t2
+                    stats.wait_time += t2 - t1
+                    stats.max_wait_time = max(stats.max_wait_time, t2 - t1)
+
+    # SMBus interface
+    def read_byte(self, address: int) -> int:
+        return self._transfer(address, 1, self.smbus.read_byte)
+
+    def write_byte(self, address: int, value: int):
+        return self._transfer(address, 1, self.smbus.write_byte, value)
+
+    def read_byte_data(self, address: int, register: int) -> int:
+        return self._transfer(address, 1, self.smbus.read_byte_data, register)
+
+    def write_byte_data(self, address: int, register: int, value: int):
+        return self._transfer(address, 1, self.smbus.write_byte_data, register, value)
+
+    def read_word_data(self, address: int, register: int) -> int:
+        return self._transfer(address, 2, self.smbus.read_word_data, register)
+
+    def write_word_data(self, address: int, register: int, value: int):
+        return self._transfer(address, 2, self.smbus.write_word_data, register, value)
+
+    def read_i2c_block_data(self, address: int, register: int, length: int = 32) -> list[int]:
+        return self._transfer(address, length, self.smbus.read_i2c_block_data, register, length)
+
+    def write_i2c_block_data(self, address: int, register: int, data: list[int]):
+        return self._transfer(address, len(data), self.smbus.write_i2c_block_data, register, data)
+
+    def status_dict(self) -> dict[str, dict[str, Union[int, float]]]:
+        elapsed = time.perf_counter() - self._start
+        with self._lock:
+            return {f"0x{address:02x}": stats.status_dict(elapsed) for address, stats in sorted(self._stats.items())}
@@ -1,4 +1,5 @@
 import struct
+from dataclasses import dataclass
 from enum import Enum
 from functools import cached_property
 
@@ -11,171 +12,121 @@ class Mode(Enum):
     NORMAL = 0b11
 
 
-class BME280(I2C_Module):
-    def _read(self, *cmd) -> int:
-        res = 0
-        for c in cmd[::-1]:
-            res = res << 8 | self.smbus.read_byte_data(self.address, c)
-        return res
-
-    def _read_bytes(self, *cmd) -> bytes:
-        res = b""
-        for c in cmd[::-1]:
-            res += struct.pack("B", self.smbus.read_byte_data(self.address, c))
-        return res
-
-    def _read_block(self, *cmd) -> list[int]:
-        res = []
-        for c in cmd:
-            res.append(self.smbus.read_byte_data(self.address, c))
-        return res
-
-    def _read_unsigned_short(self, *cmd):
-        assert len(cmd) == 2
-        return struct.unpack("H", self._read_bytes(*cmd))[0]
-
-    def _read_signed_short(self, *cmd):
-        assert len(cmd) == 2
-        return struct.unpack("h", self._read_bytes(*cmd))[0]
-
-    def _read_unsigned_char(self, *cmd):
-        assert len(cmd) == 1
-        return struct.unpack("B", self._read_bytes(*cmd))[0]
-
-    def _read_signed_char(self, *cmd):
-        assert len(cmd) == 1
-        return struct.unpack("b", self._read_bytes(*cmd))[0]
-
-    @cached_property
-    def _dig_T1(self):
-        return self._read_unsigned_short(0x88, 0x89)
-
-    @cached_property
-    def _dig_T2(self):
-        return self._read_signed_short(0x8A, 0x8B)
-
-    @cached_property
-    def _dig_T3(self):
-        return self._read_signed_short(0x8C, 0x8D)
-
-    @cached_property
-    def _dig_P1(self):
-        return self._read_unsigned_short(0x8E, 0x8F)
-
-    @cached_property
-    def _dig_P2(self):
-        return self._read_signed_short(0x90, 0x91)
+# Register blocks (see datasheet, memory map)
+CALIBRATION_1 = 0x88  # dig_T1 .. dig_H1
+CALIBRATION_2 = 0xE1  # dig_H2 .. dig_H6
+CTRL_MEAS = 0xF4
+DATA = 0xF7  # press_msb .. hum_lsb
+
+_CALIBRATION_1 = struct.Struct("<HhhHhhhhhhhhxB")
+_CALIBRATION_2 = struct.Struct("<hBbBbb")  # dig_H4 and dig_H5 share the nibbles of 0xE5
+_DATA = struct.Struct(">HBHBH")  # 20 bit pressure, 20 bit temperature (msb+lsb, xlsb), 16 bit humidity
+_BYTE = struct.Struct("B")
+
+
+@dataclass(frozen=True)
+class Calibration:
+    T1: int
+    T2: int
+    T3: int
+    P1: int
+    P2: int
+    P3: int
+    P4: int
+    P5: int
+    P6: int
+    P7: int
+    P8: int
+    P9: int
+    H1: int
+    H2: int
+    H3: int
+    H4: int
+    H5: int
+    H6: int
 
-    @cached_property
-    def _dig_P3(self):
-        return self._read_signed_short(0x92, 0x93)
-
-    @cached_property
-    def _dig_P4(self):
-        return self._read_signed_short(0x94, 0x96)
-
-    @cached_property
-    def _dig_P5(self):
-        return self._read_signed_short(0x96, 0x97)
-
-    @cached_property
-    def _dig_P6(self):
-        return self._read_signed_short(0x98, 0x99)
-
-    @cached_property
-    def _dig_P7(self):
-        return self._read_signed_short(0x9A, 0x9B)
-
-    @cached_property
-    def _dig_P8(self):
-        return self._read_signed_short(0x9C, 0x9D)
 
-    @cached_property
-    def _dig_P9(self):
-        return self._read_signed_short(0x9E, 0x9F)
-
-    @cached_property
-    def _dig_H1(self):
-        return self._read_unsigned_char(0xA1)
-
-    @cached_property
-    def _dig_H2(self):
-        return self._read_signed_short(0xE1, 0xE2)
-
-    @cached_property
-    def _dig_H3(self):
-        return self._read_unsigned_char(0xE3)
+class BME280(I2C_Module):
+    def _read_block(self, register: int, layout: struct.Struct) -> tuple:
+        """ Reads `layout.size` consecutive registers starting at `register` in one transaction """
+        return layout.unpack(bytes(self.smbus.read_i2c_block_data(self.address, register, layout.size)))
 
     @cached_property
-    def _dig_H4(self):
-        return self._read_signed_short(0xE4, 0xE5)
+    def _calibration(self) -> Calibration:
+        with self.transaction():
+            *temp_press, h1 = self._read_block(CALIBRATION_1, _CALIBRATION_1)
+            h2, h3, e4, e5, e6, h6 = self._read_block(CALIBRATION_2, _CALIBRATION_2)
+        return Calibration(*temp_press, h1, h2, h3, e4 << 4 | e5 & 0x0F, e6 << 4 | e5 >> 4, h6)
 
-    @cached_property
-    def _dig_H5(self):
-        return self._read_signed_short(0xE5, 0xE6)
+    def read_raw(self) -> tuple[int, int, int]:
+        """ :return Uncompensated temperature, pressure and humidity of one measurement (one burst read) """
+        press_high, press_low, temp_high, temp_low, adc_H = self._read_block(DATA, _DATA)
+        return temp_high << 4 | temp_low >> 4, press_high << 4 | press_low >> 4, adc_H
 
-    @cached_property
-    def _dig_H6(self):
-        return self._read_signed_char(0xE7)
+    def read(self) -> tuple[float, float, float]:
+        """ :return Temperature in °C, pressure in hPa and humidity in %RH of one measurement """
+        adc_T, adc_P, adc_H = self.read_raw()
+        t_fine = self._t_fine(adc_T)
+        return self._temperature(t_fine), self._pressure(t_fine, adc_P), self._humidity(t_fine, adc_H)
 
-    @property
-    def _tfine(self):
+    def _t_fine(self, adc_T: int) -> int:
         """ Some kind of high resolution temperature... """
-        adc_T = self._adc_T
-        var1 = ((adc_T >> 3) - (self._dig_T1 << 1)) * (self._dig_T2 >> 11)
-        var2 = ((adc_T >> 4) - self._dig_T1) * (adc_T >> 4) - (self._dig_T1 >> 12) * (self._dig_T3 >> 14)
+        c = self._calibration
+        var1 = (((adc_T >> 3) - (c.T1 << 1)) * c.T2) >> 11
+        var2 = (((((adc_T >> 4) - c.T1) * ((adc_T >> 4) - c.T1)) >> 12) * c.T3) >> 14
         return var1 + var2
 
-    @property
-    def _adc_T(self) -> int:
-        block = self._read_block(0xFA, 0xFB, 0xFC)
-        print(block)
-        return (block[0] << 16 | block[1] << 8 | block[2]) >> 4
-
-    @property
-    def _adc_P(self) -> int:
-        block = self._read_block(0xF7, 0xF8, 0xF9)
-        return (block[0] << 16 | block[1] << 8 | block[2]) >> 4
+    @staticmethod
+    def _temperature(t_fine: int) -> float:
+        return ((t_fine * 5 + 128) >> 8) / 100
+
+    def _pressure(self, t_fine: int, adc_P: int) -> float:
+        c = self._calibration
+        var1 = t_fine - 128000
+        var2 = var1 * var1 * c.P6
+        var2 += (var1 * c.P5) << 17
+        var2 += c.P4 << 35
+        var1 = ((var1 * var1 * c.P3) >> 8) + ((var1 * c.P2) << 12)
+        var1 = (((1 << 47) + var1) * c.P1) >> 33
+        if var1 == 0:
+            return 0
 
-    @property
-    def _adc_H(self) -> int:
-        return self._read(0xFD, 0xFE)
+        p = 1048576 - adc_P
+        p = (((p << 31) - var2) * 3125) // var1
+        var1 = (c.P9 * (p >> 13) * (p >> 13)) >> 25
+        var2 = (c.P8 * p) >> 19
+        p = ((p + var1 + var2) >> 8) + (c.P7 << 4)
+        return p / 256 / 100
+
+    def _humidity(self, t_fine: int, adc_H: int) -> float:
+        c = self._calibration
+        v = t_fine - 76800
+        v = (((adc_H << 14) - (c.H4 << 20) - (c.H5 * v) + 16384) >> 15) * (
+                ((((((v * c.H6) >> 10) * (((v * c.H3) >> 11) + 32768)) >> 10) + 2097152) * c.H2 + 8192) >> 14)
+        v -= ((((v >> 15) * (v >> 15)) >> 7) * c.H1) >> 4
+        v = min(max(v, 0), 419430400)
+        return (v >> 12) / 1024
 
     @property
     def temperature(self) -> float:
         """ Outputs temperature in °C """
-        return ((self._tfine * 5 + 128) >> 8) / 100
+        return self.read()[0]
 
     @property
     def pressure(self) -> float:
         """ Outputs pressure in hPa """
-        var1 = self._tfine - 128000
-        var2 = var1 * var1 * self._dig_P6
-        var2 += (var1 * self._dig_P5) << 17
-        var2 += self._dig_P4 << 35
-        var1 = ((var1 * var1 * self._dig_P3) >> 8) + ((var1 * self._dig_P2) << 12)
-        var1 = (1 << 47 + var1) * self._dig_P1 >> 33
-        if var1 == 0:
-            return 0
-
-        p = 1048576 - self._adc_P
-        p = ((p << 31) - var2) * 3125 / var1
-        var1 = (self._dig_P9 * (p >> 13) * (p >> 13)) >> 25
-        var2 = (self._dig_P8 * p) >> 19
-        p = ((p + var1 + var2) >> 8) + (self._dig_P7 << 4)
-
-        pressure = p / 256 / 100
-        return pressure
+        return self.read()[1]
 
     @property
     def humidity(self) -> float:
         """ Outputs humidity %RH """
-        return ((self._tfine * 5 + 128) >> 8) / 100
+        return self.read()[2]
 
     def set_mode(self, mode: Mode):
-        current_ctrl_meas = self._read_unsigned_char(0xF4)
-        self.smbus.write_byte_data(self.address, 0xF4, current_ctrl_meas & (~0b11) | mode.value)
+        with self.transaction():
+            current_ctrl_meas, = self._read_block(CTRL_MEAS, _BYTE)
+            self.smbus.write_byte_data(self.address, CTRL_MEAS, current_ctrl_meas & (~0b11) | mode.value)
 
     @property
     def mode(self) -> Mode:
-        return Mode(self._read_unsigned_char(0xF4) & 0b11)
+        return Mode(self._read_block(CTRL_MEAS, _BYTE)[0] & 0b11)
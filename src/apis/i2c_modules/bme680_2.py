@@ -1,9 +1,7 @@
 import struct
+from dataclasses import dataclass
 from enum import Enum
 from functools import cached_property
-from typing import Optional
-
-from smbus import SMBus
 
 from apis.i2c_modules import I2C_Module
 
@@ -14,189 +12,148 @@ class Mode(Enum):
     NORMAL = 0b11
 
 
+# Register blocks (see datasheet, memory map)
+CALIBRATION_1 = 0x8A  # par_T2 .. par_P10
+CALIBRATION_2 = 0xE1  # par_H2 .. par_G3 (incl. par_T1)
+CTRL_MEAS = 0x74
+DATA = 0x1F  # press_msb .. hum_lsb
+
+_CALIBRATION_1 = struct.Struct("<hbxHhbxhhbbxxhhB")
+_CALIBRATION_2 = struct.Struct("<BBBbbbBbHhbb")  # par_H1 and par_H2 share the nibbles of 0xE2
+_DATA = struct.Struct(">HBHBH")  # 20 bit pressure, 20 bit temperature (msb+lsb, xlsb), 16 bit humidity
+_BYTE = struct.Struct("B")
+
+
+@dataclass(frozen=True)
+class Calibration:
+    T1: int
+    T2: int
+    T3: int
+    P1: int
+    P2: int
+    P3: int
+    P4: int
+    P5: int
+    P6: int
+    P7: int
+    P8: int
+    P9: int
+    P10: int
+    H1: int
+    H2: int
+    H3: int
+    H4: int
+    H5: int
+    H6: int
+    H7: int
+
+
 class BME680(I2C_Module):
     def __init__(self, address, *, smbus=None):
         super().__init__(address, smbus=smbus)
         # raise NotImplemented("Currently not implemented or checked... Do not use!")
 
-    def _read(self, *cmd) -> int:
-        res = 0
-        for c in cmd[::-1]:
-            res = res << 8 | self.smbus.read_byte_data(self.address, c)
-        return res
-
-    def _read_bytes(self, *cmd) -> bytes:
-        res = b""
-        for c in cmd[::-1]:
-            res += struct.pack("B", self.smbus.read_byte_data(self.address, c))
-        return res
-
-    def _read_block(self, *cmd) -> list[int]:
-        res = []
-        for c in cmd:
-            res.append(self.smbus.read_byte_data(self.address, c))
-        return res
-
-    def _read_unsigned_short(self, *cmd):
-        assert len(cmd) == 2
-        return struct.unpack("H", self._read_bytes(*cmd))[0]
-
-    def _read_signed_short(self, *cmd):
-        assert len(cmd) == 2
-        return struct.unpack("h", self._read_bytes(*cmd))[0]
-
-    def _read_unsigned_char(self, *cmd):
-        assert len(cmd) == 1
-        return struct.unpack("B", self._read_bytes(*cmd))[0]
-
-    def _read_signed_char(self, *cmd):
-        assert len(cmd) == 1
-        return struct.unpack("b", self._read_bytes(*cmd))[0]
-
-    @cached_property
-    def _par_T1(self):
-        return self._read_signed_short(0xE9, 0xEA)
-
-    @cached_property
-    def _par_T2(self):
-        return self._read_signed_short(0x8A, 0x8B)
-
-    @cached_property
-    def _par_T3(self):
-        return self._read_signed_char(0x8C)
-
-    # ==================================
-
-    @cached_property
-    def _par_P1(self):
-        return self._read_unsigned_short(0x8E, 0x8F)
-
-    @cached_property
-    def _par_P2(self):
-        return self._read_signed_short(0x90, 0x91)
-
-    @cached_property
-    def _par_P3(self):
-        return self._read_signed_short(0x92)
-
-    @cached_property
-    def _par_P4(self):
-        return self._read_signed_short(0x94, 0x95)
-
-    @cached_property
-    def _par_P5(self):
-        return self._read_signed_short(0x96, 0x97)
-
-    @cached_property
-    def _par_P6(self):
-        return self._read_signed_char(0x99)
-
-    @cached_property
-    def _par_P7(self):
-        return self._read_signed_char(0x98)
-
-    @cached_property
-    def _par_P8(self):
-        return self._read_signed_short(0x9C, 0x9D)
-
-    @cached_property
-    def _par_P9(self):
-        return self._read_signed_short(0x9E, 0x9F)
-
-    @cached_property
-    def _par_P10(self):
-        return self._read_signed_short(0xA0)
-
-    @cached_property
-    def _dig_H1(self):
-        return self._read_unsigned_char(0xA1)
-
-    @cached_property
-    def _dig_H2(self):
-        return self._read_signed_short(0xE1, 0xE2)
-
-    @cached_property
-    def _dig_H3(self):
-        return self._read_unsigned_char(0xE3)
-
-    @cached_property
-    def _dig_H4(self):
-        return self._read_signed_short(0xE4, 0xE5)
+    def _read_block(self, register: int, layout: struct.Struct) -> tuple:
+        """ Reads `layout.size` consecutive registers starting at `register` in one transaction """
+        return layout.unpack(bytes(self.smbus.read_i2c_block_data(self.address, register, layout.size)))
+
+    @cached_property
+    def _calibration(self) -> Calibration:
+        with self.transaction():
+            t2, t3, p1, p2, p3, p4, p5, p7, p6, p8, p9, p10 = self._read_block(CALIBRATION_1, _CALIBRATION_1)
+            e1, e2, e3, h3, h4, h5, h6, h7, t1, _, _, _ = self._read_block(CALIBRATION_2, _CALIBRATION_2)
+        return Calibration(
+            T1=t1, T2=t2, T3=t3,
+            P1=p1, P2=p2, P3=p3, P4=p4, P5=p5, P6=p6, P7=p7, P8=p8, P9=p9, P10=p10,
+            H1=e3 << 4 | e2 & 0x0F, H2=e1 << 4 | e2 >> 4, H3=h3, H4=h4, H5=h5, H6=h6, H7=h7,
+        )
+
+    def read_raw(self) -> tuple[int, int, int]:
+        """ :return Uncompensated temperature, pressure and humidity of one measurement (one burst read) """
+        press_high, press_low, temp_high, temp_low, hum_adc = self._read_block(DATA, _DATA)
+        return temp_high << 4 | temp_low >> 4, press_high << 4 | press_low >> 4, hum_adc
+
+    def read(self) -> tuple[float, float, float]:
+        """ :return Temperature in °C, pressure in hPa and humidity in %RH of one measurement """
+        temp_adc, press_adc, hum_adc = self.read_raw()
+        t_fine = self._t_fine(temp_adc)
+        return self._temperature(t_fine), self._pressure(t_fine, press_adc), self._humidity(t_fine, hum_adc)
+
+    def _t_fine(self, temp_adc: int) -> int:
+        """ Some kind of high resolution temperature... """
+        c = self._calibration
+        var1 = (temp_adc >> 3) - (c.T1 << 1)
+        var2 = (var1 * c.T2) >> 11
+        var3 = ((((var1 >> 1) * (var1 >> 1)) >> 12) * (c.T3 << 4)) >> 14
+        return var2 + var3
 
-    @cached_property
-    def _dig_H5(self):
-        return self._read_signed_short(0xE5, 0xE6)
+    @staticmethod
+    def _temperature(t_fine: int) -> float:
+        return ((t_fine * 5 + 128) >> 8) / 100
+
+    def _pressure(self, t_fine: int, press_adc: int) -> float:
+        c = self._calibration
+        var1 = (t_fine >> 1) - 64000
+        var2 = ((((var1 >> 2) * (var1 >> 2)) >> 11) * c.P6) >> 2
+        var2 += (var1 * c.P5) << 1
+        var2 = (var2 >> 2) + (c.P4 << 16)
+        var1 = (((((var1 >> 2) * (var1 >> 2)) >> 13) * (c.P3 << 5)) >> 3) + ((c.P2 * var1) >> 1)
+        var1 = var1 >> 18
+        var1 = ((32768 + var1) * c.P1) >> 15
+        if var1 == 0:
+            return 0
 
-    @cached_property
-    def _par_H6(self):
-        return self._read_signed_char(0xE7)
+        press_comp = 1048576 - press_adc
+        press_comp = (press_comp - (var2 >> 12)) * 3125
+        if press_comp >= (1 << 30):
+            press_comp = (press_comp // var1) << 1
+        else:
+            press_comp = (press_comp << 1) // var1
 
-    @property
-    def _tfine(self):
-        """ Some kind of high resolution temperature... """
-        temp_adc = self._temp_adc
-        var1 = ((temp_adc >> 3) - (self._par_T1 << 1))
-        var2 = (var1 * self._par_T2) >> 11
-        var3 = ((((var1 >> 1) * (var1 >> 1)) >> 12) * (self._par_T3 << 4)) >> 14
-        return var2 + var3
+        var1 = (c.P9 * (((press_comp >> 3) * (press_comp >> 3)) >> 13)) >> 12
+        var2 = ((press_comp >> 2) * c.P8) >> 13
+        var3 = ((press_comp >> 8) * (press_comp >> 8) * (press_comp >> 8) * c.P10) >> 17
 
-    @property
-    def _temp_adc(self) -> int:
-        block = self._read_block(0x22, 0x23, 0x24)
-        return (block[0] << 16 | block[1] << 8 | block[2]) >> 4
+        press_comp = press_comp + ((var1 + var2 + var3 + (c.P7 << 7)) >> 4)
 
-    @property
-    def _press_adc(self) -> int:
-        block = self._read_block(0x21, 0x20, 0x1F)
-        return (block[0] << 16 | block[1] << 8 | block[2]) >> 4
+        return press_comp / 100  # Pascal -> Hectopascal
 
-    @property
-    def _adc_H(self) -> int:
-        return self._read(0xFD, 0xFE)
+    def _humidity(self, t_fine: int, hum_adc: int) -> float:
+        c = self._calibration
+        temp_scaled = (t_fine * 5 + 128) >> 8
+        var1 = hum_adc - c.H1 * 16 - (((temp_scaled * c.H3) // 100) >> 1)
+        var2 = (c.H2 * (((temp_scaled * c.H4) // 100)
+                        + (((temp_scaled * ((temp_scaled * c.H5) // 100)) >> 6) // 100) + (1 << 14))) >> 10
+        var3 = var1 * var2
+        var4 = ((c.H6 << 7) + ((temp_scaled * c.H7) // 100)) >> 4
+        var5 = ((var3 >> 14) * (var3 >> 14)) >> 10
+        var6 = (var4 * var5) >> 1
+        hum_comp = (((var3 + var6) >> 10) * 1000) >> 12
+        return min(max(hum_comp, 0), 100000) / 1000
 
     @property
     def temperature(self) -> float:
         """ Outputs temperature in °C """
-        return ((self._tfine * 5 + 128) >> 8) / 100
+        return self.read()[0]
 
     @property
     def pressure(self) -> float:
         """ Outputs pressure in hPa """
-        var1 = (self._tfine >> 1) - 64000
-        var2 = ((((var1 >> 2) * (var1 >> 2)) >> 11) * self._par_P6) >> 2
-        var2 += (var1 * self._par_P5) << 1
-        var2 = (var2 >> 2) + (self._par_P4 << 16)
-        var1 = (((((var1 >> 2) * (var1 >> 2)) >> 13) * (self._par_P3 << 5)) >> 3) + ((self._par_P2 * var1) >> 1)
-        var1 = var1 >> 18
-        var1 = ((32768 + var1) * self._par_P1) >> 15
-
-        press_comp = 1048576 - self._press_adc
-        press_comp = (press_comp - (var2 >> 12)) * 3125
-        if press_comp >= (1 << 30):
-            press_comp = ((press_comp / var1) << 1)
-        else:
-            press_comp = (press_comp << 1) / var1
-
-        var1 = (self._par_P9 * (((press_comp >> 3) * (press_comp >> 3)) >> 13) >> 12)
-        var2 = ((press_comp >> 2) * self._par_P8) >> 13
-        var3 = ((press_comp >> 8) * (press_comp >> 8) * (press_comp >> 8) * self._par_P10) >> 17
-
-        press_comp = press_comp + ((var1 + var2 + var3 + (self._par_P7 << 7)) >> 4)
-
-        return press_comp / 100  # Pascal -> Hectopascal
+        return self.read()[1]
 
     @property
     def humidity(self) -> float:
         """ Outputs humidity %RH """
-        return ((self._tfine * 5 + 128) >> 8) / 100
+        return self.read()[2]
 
     def set_mode(self, mode: Mode):
-        current_ctrl_meas = self._read_unsigned_char(0xF4)
-        self.smbus.write_byte_data(self.address, 0xF4, current_ctrl_meas & (~0b11) | mode.value)
+        with self.transaction():
+            current_ctrl_meas, = self._read_block(CTRL_MEAS, _BYTE)
+            self.smbus.write_byte_data(self.address, CTRL_MEAS, current_ctrl_meas & (~0b11) | mode.value)
 
     @property
     def mode(self) -> Mode:
-        return Mode(self._read_unsigned_char(0xF4) & 0b11)
+        return Mode(self._read_block(CTRL_MEAS, _BYTE)[0] & 0b11)
 
     @property
     def voc(self):
@@ -1,10 +1,14 @@
+import asyncio
 import time
 from enum import Enum
-from typing import Optional
+from threading import Lock
+from typing import Optional, Union, Iterator
 
+from gpiozero import DigitalInputDevice
 from smbus import SMBus
 
 from apis.i2c_modules import I2C_Module
+from utils.histogram import RollingHistogram
 
 
 class MSP_Command(Enum):
@@ -50,13 +54,27 @@ class MSP(I2C_Module):
             await_uart_timeout=10,
             uart_buffer_size=13,
             uart_ready_delay=0.1,
+            uart_min_delay=0.005,
+            uart_ready_pin: Optional[str] = None,
             smbus: Optional[SMBus]
     ):
+        """
+        :param uart_ready_delay: Maximum delay between two polls of UART_READY
+        :param uart_min_delay: First delay between two polls of UART_READY. Doubles with every poll
+        :param uart_ready_pin: GPIO pin signaling UART ready. If set, UART_READY is not polled
+        """
         super().__init__(i2c_address, smbus=smbus)
 
         self.await_uart_timeout = await_uart_timeout
         self.uart_buffer_size = uart_buffer_size
         self.uart_ready_delay = uart_ready_delay
+        self.uart_min_delay = min(uart_min_delay, uart_ready_delay)
+        self.uart_ready_line = DigitalInputDevice(uart_ready_pin) if uart_ready_pin is not None else None
+
+        # Round trip statistics per UART command
+        self._uart_stats: dict[str, dict[str, Union[int, float]]] = {}
+        self._uart_rtt: dict[str, RollingHistogram] = {}
+        self._stats_lock = Lock()
 
         try:
             self._read(MSP_Command.UART_READY)
@@ -80,6 +98,28 @@ class MSP(I2C_Module):
         return command + [0] * (self.uart_buffer_size - len(command))
 
     def uart_send_receive(self, command: list[int], expected_receive: int) -> list[int]:
+        with self.transaction():
+            key, start_t = self._uart_send(command, expected_receive)
+            try:
+                polls = self._await_uart_ready(key, start_t)
+            except UARTTimeout:
+                self._record_uart(key, None, 0)
+                raise
+            return self._uart_receive(key, start_t, polls, expected_receive)
+
+    async def uart_send_receive_async(self, command: list[int], expected_receive: int) -> list[int]:
+        """ Same as `uart_send_receive`, but awaits the UART answer without blocking the event loop """
+        async with self.async_transaction():
+            key, start_t = self._uart_send(command, expected_receive)
+            try:
+                polls = await self._await_uart_ready_async(key, start_t)
+            except UARTTimeout:
+                self._record_uart(key, None, 0)
+                raise
+            return self._uart_receive(key, start_t, polls, expected_receive)
+
+    def _uart_send(self, command: list[int], expected_receive: int) -> tuple[str, float]:
+        """ :return Statistics key of the command and send time """
         self.logger.debug("UART")
         # Write Command to buffer
         self._write(MSP_Command.UART_SET_COMMAND, self._pad_uart_cmd(command))
@@ -93,14 +133,13 @@ class MSP(I2C_Module):
 
         # Await UART return data
         self.logger.debug(f"Waiting for UART Ready")
-        start_t = time.time()
-        while self._read(MSP_Command.UART_READY)[0] == 0:
-            # Check timeout
-            if time.time() - start_t > self.await_uart_timeout:
-                raise UARTTimeout()
-            time.sleep(self.uart_ready_delay)
+        return bytes(command).hex(), time.perf_counter()
 
-        self.logger.debug(f"UART Ready after {time.time() - start_t}s")
+    def _uart_receive(self, key: str, start_t: float, polls: int, expected_receive: int) -> list[int]:
+        rtt = time.perf_counter() - start_t
+        self._record_uart(key, rtt, polls)
+
+        self.logger.debug(f"UART Ready after {rtt}s ({polls} polls)")
 
         # Receive data
         data = self._read(MSP_Command.UART_RECEIVE_DATA, self.uart_buffer_size)
@@ -108,6 +147,81 @@ class MSP(I2C_Module):
         self.logger.debug(f"Received data: {data}")
         return data
 
+    def _uart_poll_delays(self, key: str) -> Iterator[float]:
+        """
+        Delays before the polls of UART_READY. The first poll happens shortly before the estimated round trip time of
+        the command, then the delay between polls grows exponentially up to `uart_ready_delay`.
+        """
+        with self._stats_lock:
+            estimate = self._uart_stats.get(key, {}).get("rtt_estimate")
+        yield 0.8 * estimate if estimate is not None else 0
+
+        delay = self.uart_min_delay
+        while True:
+            yield delay
+            delay = min(2 * delay, self.uart_ready_delay)
+
+    def _await_uart_ready(self, key: str, start_t: float) -> int:
+        """
+        Waits for the UART answer, see `_uart_poll_delays`.
+
+        :return Number of polls
+        """
+        if self.uart_ready_line is not None:
+            if not self.uart_ready_line.wait_for_active(timeout=self.await_uart_timeout):
+                raise UARTTimeout()
+            return 0
+
+        polls = 0
+        for delay in self._uart_poll_delays(key):
+            # Check timeout
+            if time.perf_counter() - start_t > self.await_uart_timeout:
+                raise UARTTimeout()
+            time.sleep(delay)
+            polls += 1
+            if self._read(MSP_Command.UART_READY)[0] != 0:
+                return polls
+
+    async def _await_uart_ready_async(self, key: str, start_t: float) -> int:
+        """ Same as `_await_uart_ready`, the ready line is polled as well """
+        polls = 0
+        for delay in self._uart_poll_delays(key):
+            if time.perf_counter() - start_t > self.await_uart_timeout:
+                raise UARTTimeout()
+            await asyncio.sleep(delay)
+            if self.uart_ready_line is not None:
+                if self.uart_ready_line.is_active:
+                    return 0
+                continue
+            polls += 1
+            if self._read(MSP_Command.UART_READY)[0] != 0:
+                return polls
+
+    def _record_uart(self, key: str, rtt: Optional[float], polls: int):
+        """ Records a round trip (`rtt` None: timeout) """
+        with self._stats_lock:
+            stats = self._uart_stats.setdefault(key, {
+                "count": 0, "timeouts": 0, "polls": 0, "last_rtt": None, "rtt_estimate": None,
+            })
+            if rtt is None:
+                stats["timeouts"] += 1
+                return
+            stats["count"] += 1
+            stats["polls"] += polls
+            stats["last_rtt"] = rtt
+            # Smoothed round trip time (like TCP)
+            estimate = stats["rtt_estimate"]
+            stats["rtt_estimate"] = rtt if estimate is None else 0.875 * estimate + 0.125 * rtt
+            self._uart_rtt.setdefault(key, RollingHistogram()).record(rtt)
+
+    def uart_status_dict(self) -> dict[str, dict[str, Union[int, float]]]:
+        """ Round trip statistics per UART command (hex) """
+        with self._stats_lock:
+            return {
+                key: {**stats, "rtt": self._uart_rtt[key].summary() if key in self._uart_rtt else None}
+                for key, stats in self._uart_stats.items()
+            }
+
     # Fan
     def fan_tacho(self) -> float:
         """
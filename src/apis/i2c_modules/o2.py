@@ -18,6 +18,8 @@ class TB200B(I2C_Module):
             await_uart_timeout: float = 10,
             uart_buffer_size: int = 13,
             uart_ready_delay: float = 0.1,
+            uart_min_delay: float = 0.005,
+            uart_ready_pin: Optional[str] = None,
             smbus: Optional[SMBus] = None
     ):
         super().__init__(msp_address, smbus=smbus)
@@ -31,6 +33,8 @@ class TB200B(I2C_Module):
             await_uart_timeout=await_uart_timeout,
             uart_buffer_size=uart_buffer_size,
             uart_ready_delay=uart_ready_delay,
+            uart_min_delay=uart_min_delay,
+            uart_ready_pin=uart_ready_pin,
             smbus=smbus
         )
 
@@ -122,11 +126,22 @@ class TB200B(I2C_Module):
         o2_ppb = (o2_ppb_high << 8) + o2_ppb_low
         return o2, range_, o2_ppb
 
+    _READ_DATA_COMMAND = [0xff, 0x00, 0x87, 0x00, 0x00, 0x00, 0x00, 0x00, 0x79]
+
     def read_data(self) -> tuple[int, int, int, float, float]:
         """
         Command 6
         """
-        data = self.msp.uart_send_receive([0xff, 0x00, 0x87, 0x00, 0x00, 0x00, 0x00, 0x00, 0x79], 13)
+        return self._parse_data(self.msp.uart_send_receive(self._READ_DATA_COMMAND, 13))
+
+    async def read_data_async(self) -> tuple[int, int, int, float, float]:
+        """
+        Command 6, awaits the UART answer without blocking the event loop
+        """
+        return self._parse_data(await self.msp.uart_send_receive_async(self._READ_DATA_COMMAND, 13))
+
+    @staticmethod
+    def _parse_data(data: list[int]) -> tuple[int, int, int, float, float]:
         _, cmd, o2_high, o2_low, range_high, range_low, o2_ppb_high, o2_ppb_low, temp_high, temp_low, hum_high, hum_low, parity = data
 
         assert cmd == 0x87
@@ -35,6 +35,11 @@ class PWMDevice(GKBase):
         self.logger.debug(f"Change duty cycle to {value}")
         self.pwm.change_duty_cycle(value * 100)
 
+    def set_frequency(self, frequency: float):
+        self.logger.debug(f"Change frequency to {frequency}")
+        self.pwm.change_frequency(frequency)
+        self.frequency = frequency
+
     def on(self):
         self._value = 1
         self.pwm.start(100)
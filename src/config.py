@@ -14,12 +14,16 @@ from modules import GKBaseModule
 class ScheduleItem:
     duration: int
     value: Any
+    ramp: Optional[str] = None  # Ramp from the previous value to `value` (`linear`, `sigmoid`), None: step
 
 
 OmegaConf.register_new_resolver("hex", lambda arg: int(arg, 16))
 OmegaConf.register_new_resolver("path", lambda arg: Path(arg))
 OmegaConf.register_new_resolver("tuple", lambda *args: tuple(args))
 OmegaConf.register_new_resolver("schedule", lambda duration, value: ScheduleItem(duration, value))
+OmegaConf.register_new_resolver(
+    "ramp", lambda duration, value, ramp="linear": ScheduleItem(duration, value, ramp)
+)
 
 
 @dataclass
@@ -27,7 +31,7 @@ class HydraConfig:
     # General Software
     smbus: SMBus
     cycle_delay: float  # Small delay preventing cpu from unnecessary overusing
-    update_timeout: int  # Time after which a module receives a timeout
+    update_timeout: float  # Time after which a module update is reported by the watchdog
     multi_threading: bool
 
     # Data
@@ -39,6 +43,37 @@ class HydraConfig:
     # Raspberry Pi Configs
     pin_factory: PiFactory = RPiGPIOFactory()
     config_yaml: Optional[str] = None
+    run_duration: Optional[float] = None  # Shut down after this many seconds (e.g. for benchmarks), None: run forever
+
+    # I2C bus priority per address (e.g. "0x69"). Lower values are granted first if transfers wait for the bus
+    i2c_priorities: Optional[dict[str, int]] = None
+
+    # Setup
+    setup_workers: int = 1  # Number of module setups running in parallel (1: one after another)
+    setup_dependencies: Optional[dict[str, list[str]]] = None  # Overrides setup dependencies per module
+
+    # Scheduling
+    # `poll`: Check every module each cycle_delay, `deadline`: Sleep until next module is due,
+    # `asyncio`: One task per module, sync modules run in an executor
+    scheduler: str = "poll"
+    schedule_mode: str = "fixed_delay"  # `fixed_delay`: Period starts at last update, `fixed_rate`: Fixed grid
+    catch_up_policy: str = "skip"  # `fixed_rate` only: `skip` or `catch_up` missed updates
+    phase_stagger: bool = True  # Spread first updates of modules with the same update_frequency over their period
+    phase_offsets: Optional[dict[str, float]] = None  # Explicit offset of the first update in seconds per module
+    worker_threads: int = 4  # Number of workers for multi_threading and the asyncio executor
+    worker_queue_size: int = 8  # Maximum number of queued module updates for multi_threading
+
+    # Watchdog
+    module_timeouts: Optional[dict[str, float]] = None  # Overrides update_timeout for single modules
+    watchdog_max_overruns: int = 3  # Disable module after this many consecutive timeouts (0: never disable)
+
+    # Telemetry
+    telemetry_bus: bool = False  # Deliver telemetry/media asynchronously with one queue per sink module
+    telemetry_queue_size: int = 256  # Maximum number of queued messages per sink
+    telemetry_policy: str = "drop_oldest"  # Policy if queue is full: `drop_oldest`, `drop_newest`, `block`
+    telemetry_sink_policies: Optional[dict[str, str]] = None  # Overrides telemetry_policy for single sinks
+    # Overrides consumed origins/fields of single sinks: {sink: {origins: [...], fields: [...], exclude_fields: [...]}}
+    telemetry_routes: Optional[dict[str, dict[str, list[str]]]] = None
 
     @classmethod
     def from_hydra(cls, **kwargs) -> "HydraConfig":
@@ -1,22 +1,52 @@
 #!/usr/bin/env python3
-import logging
-import sys
+import time
 
-import hydra
-from hydra.utils import instantiate
-from omegaconf import DictConfig, OmegaConf
+from utils.profiler import profiler
 
-from config import HydraConfig
-from mainboard import MainBoard
+with profiler.phase("imports"):
+    import logging
+    import os
+    import sys
+    from pathlib import Path
+
+    import hydra
+    from hydra.core.hydra_config import HydraConfig as HydraRuntimeConfig
+    from hydra.utils import instantiate
+    from omegaconf import DictConfig, OmegaConf
+
+    import config as config_module
+    from config import HydraConfig
+    from mainboard import MainBoard
+    from utils.config_cache import ConfigCache, CACHE_ENV
+    from utils.hydra import instantiate_modules
+
+CONFIG_PATH = Path(__file__).parent.parent / "config"
+
+config_cache = ConfigCache(
+    os.environ.get(CACHE_ENV),
+    config_dir=CONFIG_PATH,
+    args=sys.argv[1:],
+    resolver_file=Path(config_module.__file__),
+)
 
 
 @hydra.main(config_name="base_config", version_base=None, config_path="../config")
 def main(cfg: DictConfig):
-    config_yaml = OmegaConf.to_yaml(cfg)
+    profiler.record("hydra_compose", profiler.last_end, time.perf_counter())
+    with profiler.phase("to_yaml"):
+        config_yaml = OmegaConf.to_yaml(cfg)
+    config_cache.save(cfg, config_yaml, HydraRuntimeConfig.get())
+    run(cfg, config_yaml)
+
+
+def run(cfg: DictConfig, config_yaml: str):
     print(f"Python version: {sys.version}")
     print(config_yaml)
 
-    config = instantiate(cfg)
+    with profiler.phase("instantiate"):
+        modules = instantiate_modules(cfg)
+        config = instantiate(cfg, modules=None)
+        config.modules = modules
     config.config_yaml = config_yaml
     assert isinstance(config, HydraConfig)
 
@@ -24,9 +54,17 @@ def main(cfg: DictConfig):
     logging.getLogger("urllib3").setLevel(logging.WARNING)
     logging.getLogger("picamera2").setLevel(logging.WARNING)
 
-    mainboard = MainBoard(config)
+    with profiler.phase("mainboard"):
+        mainboard = MainBoard(config)
     mainboard.start()
 
 
 if __name__ == '__main__':
-    main()
+    with profiler.phase("config_cache"):
+        compiled = config_cache.load()
+    if compiled is None:
+        main()
+    else:
+        compiled.configure_logging()
+        logging.getLogger("klee.config").info(f"Using cached config ({config_cache.path})")
+        run(compiled.cfg, compiled.config_yaml)
@@ -1,3 +1,4 @@
+import asyncio
 import datetime
 import json
 import logging
@@ -5,18 +6,30 @@ import signal
 import subprocess
 import time
 import traceback
+from dataclasses import asdict
+from concurrent.futures import ThreadPoolExecutor, Future
 from pathlib import Path
-from threading import Thread
 from typing import Union, Optional
 
 from gpiozero import Device
+from hydra.utils import instantiate
+from omegaconf import OmegaConf, DictConfig
 
+from apis.i2c_modules.arbiter import I2CBusArbiter
 from config import HydraConfig
 from modules import GKBaseModule
 from modules.fan import FanControllerModule
 from modules.light import LightModule
 from utils.datatypes import TelemetryType
-from utils.utils import get_time, get_git_version, get_git_branch
+from utils.motion_channel import MotionChannel
+from utils.parallel_setup import run_setup, SetupResult
+from utils.profiler import profiler
+from utils.scheduler import DeadlineScheduler, assign_phase_offsets
+from utils.telemetry_bus import TelemetryBus
+from utils.telemetry_routing import TelemetryRouter
+from utils.utils import get_time, get_git_version, get_git_branch, get_monotonic_time
+from utils.watchdog import Watchdog
+from utils.worker_pool import WorkerPool, IsolatedWorker
 
 
 class MainModule(GKBaseModule):
@@ -34,18 +47,18 @@ class MainBoard:
 
         # Config
         self.config_yaml = config.config_yaml  # Save full configuration
-        self.smbus = config.smbus
+        self.smbus = I2CBusArbiter(config.smbus, config.i2c_priorities) if config.smbus is not None else None
         self.cycle_delay = config.cycle_delay  # Seconds
         if self.cycle_delay >= 1:
             self.logger.warning(f"Cycle delay is >= 1 second ({self.cycle_delay})")
-        self.update_timeout = int(config.update_timeout)  # Seconds
-        if self.update_timeout < 1:
-            self.logger.warning(f"Update timeout is < 1 seconds (int({config.update_timeout}) -> {self.update_timeout})")
+        self.update_timeout = float(config.update_timeout)  # Seconds
         self.data_location = Path(config.data_location)
         self.data_location.mkdir(exist_ok=True, parents=True)
         Device.pin_factory = config.pin_factory
-        self.git_version = get_git_version()
-        self.git_branch = get_git_branch()
+        with profiler.phase("git_version"):
+            self.git_version = get_git_version()
+        with profiler.phase("git_branch"):
+            self.git_branch = get_git_branch()
         self.logger.info(f"Running on git version: {self.git_version}")
         self.logger.info(f"Running on git branch: {self.git_branch}")
 
@@ -56,32 +69,95 @@ class MainBoard:
             self.logger.warning(f"No modules loaded!")
         self.logger.debug(f"{len(self.modules)} modules loaded.")
 
+        # Scheduler
+        self.scheduler_mode = config.scheduler
+        self.logger.debug(f"Scheduler: {self.scheduler_mode}")
+        if self.scheduler_mode == "poll":
+            self.scheduler: Optional[DeadlineScheduler] = None
+            self._update_loop = self._update_loop_poll
+        elif self.scheduler_mode == "deadline":
+            self.scheduler = None  # Created when update loop starts
+            self._update_loop = self._update_loop_deadline
+        elif self.scheduler_mode == "asyncio":
+            self.scheduler = None
+            self._update_loop = self._update_loop_asyncio
+        else:
+            raise ValueError(f"Unknown scheduler `{self.scheduler_mode}` (Choose from `poll`, `deadline`, `asyncio`)")
+
+        for module in self.modules:
+            module.set_schedule_mode(config.schedule_mode, config.catch_up_policy)
+        self.setup_workers = config.setup_workers
+        self.setup_dependencies = config.setup_dependencies
+        self.setup_results: dict[str, SetupResult] = {}
+        self.phase_stagger = config.phase_stagger
+        self.phase_offsets = config.phase_offsets
+
+        # Asyncio runtime
+        self._async_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._async_wakeup: Optional[asyncio.Event] = None
+        self._async_executor: Optional[ThreadPoolExecutor] = None
+        self._async_workers = config.worker_threads
+
         # Multithreading
         self.multithreading_activated = config.multi_threading
         self.logger.debug(f"Multithreading: {self.multithreading_activated}")
+        if self.multithreading_activated and self.scheduler_mode == "asyncio":
+            self.logger.warning("Multithreading is ignored by the asyncio scheduler (sync modules run in an executor)")
+            self.multithreading_activated = False
         if self.multithreading_activated:
-            self.running_threads: dict[str, Thread] = {}
+            self.worker_pool: Optional[WorkerPool] = WorkerPool(config.worker_threads, config.worker_queue_size)
+            self.logger.debug(f"Worker threads: {config.worker_threads} (Queue size: {config.worker_queue_size})")
             self.update_module = self._update_module_multi_thread
         else:
+            self.worker_pool = None
             self.update_module = self._update_module_single_thread
+        # Executes single thread updates, so the update loop continues if a module hangs
+        self.update_worker = IsolatedWorker("Update")
+        self._hung_updates: dict[str, Future] = {}
+
+        # Watchdog
+        self.watchdog = Watchdog(
+            default_timeout=self.update_timeout,
+            timeouts=config.module_timeouts,
+            max_overruns=config.watchdog_max_overruns,
+        )
+
+        # Motion events (imu -> camera)
+        self.motion_channel = MotionChannel()
+
+        # Telemetry
+        self.telemetry_router = TelemetryRouter(
+            self.modules,
+            routes=config.telemetry_routes,
+            origins=[self.main_module.__name__],
+        )
+        if config.telemetry_bus:
+            self.telemetry_bus: Optional[TelemetryBus] = TelemetryBus(
+                self.modules,
+                self.telemetry_router,
+                queue_size=config.telemetry_queue_size,
+                policy=config.telemetry_policy,
+                sink_policies=config.telemetry_sink_policies,
+            )
+        else:
+            self.telemetry_bus = None
 
         # Set signal handler
-        def raise_timeout(signum, frame):
-            self.logger.exception("TIMEOUT")
-            raise TimeoutError()
-
         def set_quit(signum, frame):
             self.logger.warning(f"Received {signal.getsignal(signum)}! Quitting now...")
             self.running = False
+            self.wakeup()
 
-        signal.signal(signal.SIGALRM, raise_timeout)
         signal.signal(signal.SIGTERM, set_quit)
 
         # Mainboard state
         self.running: bool = True
         self.quit_time: Optional[float] = None
+        self.run_duration = config.run_duration
         self.start_time: float = get_time()
         self._updates_per_second: int = 0
+        self._updates: int = 0
+        self._full_second: float = 0
 
     def start(self):
         try:
@@ -98,22 +174,59 @@ class MainBoard:
 
     def initialize(self):
         self.logger.debug(f"Initializing modules")
+        if self.telemetry_bus is not None:
+            self.telemetry_bus.start()
+
+        t1 = time.perf_counter()
+        self.setup_results = run_setup(
+            self.modules,
+            self._setup_module,
+            workers=self.setup_workers,
+            dependencies=self.setup_dependencies,
+        )
+        duration = time.perf_counter() - t1
+
         i = 0
         for module in self.modules:
-            try:
-                module.setup(self)
+            result = self.setup_results[module.__name__]
+            if result.success:
                 i += 1
-            except KeyboardInterrupt:
-                raise
-            except BaseException as e:
+            else:
                 module.disable()
-                self.logger.error(f"Error while initializing {module} ({e})")
+                self.logger.error(f"Error while initializing {module} ({result.error})")
+
+        # Setup time report
+        for name, result in sorted(self.setup_results.items(), key=lambda item: -item[1].duration):
+            self.logger.info(f"Setup `{name}`: {result.duration:.3f}s (started after {result.start:.3f}s)")
+        self.logger.info(f"Initialize complete. ({i}/{len(self.modules)}) in {duration:.3f}s")
+
+        # Phases are assigned after setup, as the setup time can be longer than the offsets
+        phases = assign_phase_offsets(self.modules, get_monotonic_time(), self.phase_offsets, self.phase_stagger)
+        self.logger.debug(f"Phase offsets: {phases}")
+
+        self.watchdog.start()
+
+        if self.worker_pool is not None:
+            self.worker_pool.start()
 
-        self.logger.info(f"Initialize complete. ({i}/{len(self.modules)})")
+        report_path = profiler.write()
+        if report_path is not None:
+            self.logger.info(f"Startup profile written to {report_path}")
+
+        if self.run_duration is not None:
+            self.quit_time = get_time() + self.run_duration
+
+    def _setup_module(self, module: GKBaseModule):
+        with profiler.phase(f"setup:{module.__name__}"):
+            module.setup(self)
 
     def destroy(self):
         self.logger.debug(f"Destroying modules")
         self.running = False
+        if self.telemetry_bus is not None:
+            # Deliver queued telemetry before sinks get destroyed
+            self.telemetry_bus.stop(timeout=5)
+
         for module in self.modules:
             try:
                 module.destroy()
@@ -122,24 +235,22 @@ class MainBoard:
             except BaseException as e:
                 self.logger.error(f"Error while destroying {module} ({e})")
 
+        if self.worker_pool is not None:
+            self.worker_pool.stop(timeout=1)
+        self.update_worker.stop()
+        self.watchdog.stop()
+
     def update_loop(self):
-        self.logger.debug(f"Starting update loop")
-        full_second = 0
-        updates = 0
+        self.logger.debug(f"Starting update loop ({self.scheduler_mode})")
+        self._update_loop()
+
+    def _update_loop_poll(self):
         while self.running:
             t = get_time()
             # Check whether shutdown is due
-            if self.quit_time is not None and t > self.quit_time:
-                self.running = False
+            if self._shutdown_due(t):
                 break
-
-            # Calculate updates per second
-            this_full_second = t // 1
-            if this_full_second != full_second:
-                full_second = this_full_second
-                self._updates_per_second = updates
-                updates = 0
-            updates += 1
+            self._count_update(t)
 
             # Update modules
             for module in self.modules:
@@ -149,62 +260,196 @@ class MainBoard:
             if self.cycle_delay is not None:
                 time.sleep(self.cycle_delay)
 
+    def _update_loop_deadline(self):
+        self.scheduler = DeadlineScheduler(self.modules, min_interval=self.cycle_delay)
+        while self.running:
+            t = get_time()
+            # Check whether shutdown is due
+            if self._shutdown_due(t):
+                break
+            self._count_update(t)
+
+            # Update due modules only
+            now = get_monotonic_time()
+            for index, module in self.scheduler.pop_due(now):
+                self.update_module(module, t)
+                if self.worker_pool is not None and self.worker_pool.is_pending(module.__name__):
+                    continue  # Scheduled again by the worker once the update finished
+                self.scheduler.push(index, module, now)
+
+            # Sleep until next module (or shutdown) is due
+            timeout = self.scheduler.next_deadline - get_monotonic_time()
+            if self.quit_time is not None:
+                timeout = min(timeout, self.quit_time - get_time())
+            self.scheduler.wait(timeout)
+
+    def _update_loop_asyncio(self):
+        asyncio.run(self._run_async())
+
+    async def _run_async(self):
+        self._async_loop = asyncio.get_running_loop()
+        self._async_wakeup = asyncio.Event()
+        self._async_executor = ThreadPoolExecutor(max_workers=self._async_workers, thread_name_prefix="Module")
+        tasks = [asyncio.create_task(self._run_module_async(module)) for module in self.modules]
+
+        try:
+            while not self._shutdown_due(get_time()):
+                # Sleep until shutdown is due or woken up (e.g. by telecommand)
+                timeout = None if self.quit_time is None else self.quit_time - get_time()
+                await self._sleep_async(timeout)
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            # Do not wait for hanging sync modules
+            self._async_executor.shutdown(wait=False)
+            self._async_loop = None
+
+    async def _run_module_async(self, module: GKBaseModule):
+        while self.running:
+            t = get_time()
+            if module.expects_next_execution(get_monotonic_time()):
+                self._count_update(t)
+                if module.is_async:
+                    with self.watchdog.watch(module):
+                        await module.update_async(t)
+                else:
+                    await self._async_loop.run_in_executor(
+                        self._async_executor, self._update_module_watched, module, t
+                    )
+
+            timeout = module.next_execution_time() - get_monotonic_time()
+            await self._sleep_async(max(timeout, self.cycle_delay or 0))
+
+    async def _sleep_async(self, timeout: Optional[float]):
+        """ Sleeps `timeout` seconds (None -> forever) or until `wakeup` gets called """
+        try:
+            await asyncio.wait_for(self._async_wakeup.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+    def _wakeup_async(self):
+        # Replace event, so every sleeping task wakes up exactly once
+        wakeup, self._async_wakeup = self._async_wakeup, asyncio.Event()
+        wakeup.set()
+
+    def _shutdown_due(self, t: float) -> bool:
+        if self.quit_time is not None and t > self.quit_time:
+            self.running = False
+        return not self.running
+
+    def _count_update(self, t: float):
+        # Calculate updates per second
+        this_full_second = t // 1
+        if this_full_second != self._full_second:
+            self._full_second = this_full_second
+            self._updates_per_second = self._updates
+            self._updates = 0
+        self._updates += 1
+
+    def request_reschedule(self):
+        """ Reschedules all modules, e.g. after a module got enabled or changed its update frequency """
+        if self.scheduler is not None:
+            self.scheduler.request_reschedule()
+        self.wakeup()
+
+    def wakeup(self):
+        """ Wakes up the update loop, e.g. after a telecommand changed the state of the mainboard """
+        if self.scheduler is not None:
+            self.scheduler.wakeup()
+        if self._async_loop is not None:
+            self._async_loop.call_soon_threadsafe(self._wakeup_async)
+
     def log_telemetry(self, data: TelemetryType, origin: "GKBaseModule"):
-        for module in self.modules:
-            if module.is_enabled and module != origin:
-                try:
-                    module.log_telemetry(data, origin=origin)
-                except KeyboardInterrupt:
-                    raise
-                except BaseException as e:
-                    self.logger.error(f"Error while logging telemetry to {module} (data={data}, Exception={e})")
+        if self.telemetry_bus is not None:
+            self.telemetry_bus.publish_telemetry(data, origin)
+            return
+
+        for module, module_data in self.telemetry_router.route(data, origin):
+            try:
+                module.log_telemetry(module_data, origin=origin)
+            except KeyboardInterrupt:
+                raise
+            except BaseException as e:
+                self.logger.error(f"Error while logging telemetry to {module} (data={data}, Exception={e})")
 
     def log_media(self, name: str, data: bytes, origin: "GKBaseModule"):
-        for module in self.modules:
-            if module.is_enabled and module != origin:
-                try:
-                    module.log_media(name, data, origin=origin)
-                except KeyboardInterrupt:
-                    raise
-                except BaseException as e:
-                    self.logger.error(f"Error while logging media to {module} ({e})")
+        if self.telemetry_bus is not None:
+            self.telemetry_bus.publish_media(name, data, origin)
+            return
+
+        for module in self.telemetry_router.route_media(origin):
+            try:
+                module.log_media(name, data, origin=origin)
+            except KeyboardInterrupt:
+                raise
+            except BaseException as e:
+                self.logger.error(f"Error while logging media to {module} ({e})")
+
+    def log_waveform(self, stream: str, samples: "np.ndarray", rate: float, start_time: float, origin: "GKBaseModule"):
+        """ Delivers samples (shape (n, channels)) to waveform sinks. `samples` must not be modified afterwards """
+        if self.telemetry_bus is not None:
+            self.telemetry_bus.publish_waveform(stream, samples, rate, start_time, origin)
+            return
+
+        for module in self.telemetry_router.route_waveform(origin):
+            try:
+                module.log_waveform(stream, samples, rate, start_time, origin=origin)
+            except KeyboardInterrupt:
+                raise
+            except BaseException as e:
+                self.logger.error(f"Error while logging waveform to {module} ({e})")
 
     @property
     def updates_per_second(self) -> int:
         return self._updates_per_second
 
-    def _update_module_single_thread(self, module: GKBaseModule, t: float):
-        signal.alarm(self.update_timeout)
-        module.update(t)
-        signal.alarm(0)
+    def _update_module_watched(self, module: GKBaseModule, t: float):
+        if not module.expects_next_execution(get_monotonic_time()):
+            return
 
-    def _update_module_multi_thread(self, module: GKBaseModule, t: float):
-        if not module.expects_next_execution(t):
+        with self.watchdog.watch(module):
+            module.update(t)
+
+    def _update_module_single_thread(self, module: GKBaseModule, t: float):
+        if not module.expects_next_execution(get_monotonic_time()):
             return
 
-        thread_name = module.__name__
+        # Do not start another update while an abandoned update of the module is still hanging
+        hung_update = self._hung_updates.get(module.__name__)
+        if hung_update is not None:
+            if not hung_update.done():
+                self.logger.debug(f"Update of `{module.__name__}` still hanging. Skipping.")
+                return
+            del self._hung_updates[module.__name__]
+
+        # Updates run one at a time in the update worker. A hanging update is reported (and eventually disabled) by
+        # the watchdog, while the update loop continues with a new worker
+        future = self.update_worker.run(
+            lambda: self._update_module_watched(module, t),
+            timeout=self.watchdog.timeout_for(module),
+        )
+        if not future.done():
+            self._hung_updates[module.__name__] = future
+        elif future.exception() is not None:
+            self.logger.error(f"Error while updating {module} ({future.exception()})")
 
-        # Multithread Thread
-        if thread_name in self.running_threads:
-            self.logger.warning(f"Thread {thread_name} already running!")
+    def _update_module_multi_thread(self, module: GKBaseModule, t: float):
+        if not module.expects_next_execution(get_monotonic_time()):
             return
 
-        def remove_thread_on_exit():
-            self.logger.debug(f"Starting thread for module `{thread_name}`")
-            signal.alarm(self.update_timeout)
+        def update():
+            self.logger.debug(f"Worker started for module `{module.__name__}`")
             try:
-                module.update(t)
-                signal.alarm(0)
-            except KeyboardInterrupt:
-                self.running_threads.pop(thread_name)
-                raise
+                with self.watchdog.watch(module):
+                    module.update(t)
+            finally:
+                if self.scheduler is not None:
+                    self.scheduler.resume(module)
+            self.logger.debug(f"Worker finished for module `{module.__name__}`")
 
-            self.running_threads.pop(thread_name)
-            self.logger.debug(f"Thread finished for module `{thread_name}`")
-
-        thread = Thread(target=remove_thread_on_exit, daemon=True)
-        self.running_threads[thread_name] = thread
-        thread.start()
+        # Hand module over to worker pool. Skipped if module is still queued/running or the queue is full
+        self.worker_pool.submit(module.__name__, update)
 
     def status_dict(self) -> dict[str, Union[str, int, float, bool]]:
         modules_status = {}
@@ -217,6 +462,17 @@ class MainBoard:
             "start_time": self.start_time,
             "running": self.running,
             "multithreading": self.multithreading_activated,
+            "watchdog": self.watchdog.status_dict(),
+            "i2c": self.smbus.status_dict() if self.smbus is not None else None,
+            "setup": {name: asdict(result) for name, result in self.setup_results.items()},  # noqa
+            "telemetry_routes": self.telemetry_router.status_dict(),  # noqa
+            "telemetry_bus": self.telemetry_bus.status_dict() if self.telemetry_bus is not None else None,
+            "motion_channel": self.motion_channel.status_dict(),
+            "worker_pool": self.worker_pool.status_dict() if self.worker_pool is not None else None,
+            "update_worker": self.update_worker.status_dict(),
+            "hung_updates": sorted(self._hung_updates),  # noqa
+            "scheduler": self.scheduler_mode,
+            "updates_per_second": self.updates_per_second,
             "cycle_delay": self.cycle_delay,
             "data_location": str(self.data_location.absolute()),
             "git_version": self.git_version,
@@ -235,6 +491,7 @@ class MainBoard:
         except:
             self.logger.error(f"Executing {command_type} failed with data \"{data}\"")
             self.logger.error(traceback.format_exc())
+        self.wakeup()
 
     def _receive_command(self, command_type: str, data: str):
         tc_handlers = {
@@ -248,6 +505,7 @@ class MainBoard:
             "video": self._tc_camera_video,
             "debug_led_enable": self._tc_debug_led_enable,
             "shell": self._tc_shell,
+            "reconfigure": self._tc_reconfigure,
         }
 
         tc_handler = tc_handlers.get(command_type, None)
@@ -397,3 +655,29 @@ class MainBoard:
         self.log_media(script_path.name, data.encode("utf-8"), self.main_module)
         self.log_media(f"{script_path.name}.stdout", process.stdout, self.main_module)
         self.log_media(f"{script_path.name}.stderr", process.stderr, self.main_module)
+
+    def _tc_reconfigure(self, data: str):
+        """
+        Applies a partial config to running modules without restart. `data` is a YAML mapping module -> parameters:
+            {light: {update_frequency: 60, timeline: ["${schedule:43200, 1}", "${schedule:43200, 0}"]}}
+        Values are instantiated like the config (resolvers and `_target_` are supported). Changes are not persisted.
+        """
+        changes = OmegaConf.create(data)
+        if not isinstance(changes, DictConfig):
+            raise ValueError(f"Expected mapping module -> parameters. Got: {data}")
+
+        # Validate all modules before changing anything
+        modules = {}
+        for name, module_changes in changes.items():
+            module = self.get_module(name)
+            if module is None:
+                raise ValueError(f"Module `{name}` does not exist")
+            unknown = set(module_changes) - set(module.reconfigurable)
+            if len(unknown) > 0:
+                raise ValueError(f"Cannot reconfigure {sorted(unknown)} of `{name}` ({module.reconfigurable})")
+            modules[name] = module
+
+        for name, module in modules.items():
+            module.reconfigure(instantiate(changes[name]))
+
+        self.request_reschedule()
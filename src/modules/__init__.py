@@ -1,25 +1,65 @@
 import abc
+import asyncio
+import bisect
 import datetime
+import inspect
+import itertools
 import logging
+import math
 import time
-from typing import Optional, Union
+from contextlib import contextmanager
+from typing import Optional, Union, Mapping, Any
 
 from utils.datatypes import TelemetryType
-from utils.utils import GKBase
+from utils.histogram import RollingHistogram
+from utils.ramp import RampDriver, ramp_table, lookup
+from utils.utils import GKBase, get_monotonic_time, get_time
+
+SCHEDULE_MODES = ("fixed_delay", "fixed_rate")
+CATCH_UP_POLICIES = ("skip", "catch_up")
 
 
 class GKBaseModule(GKBase, abc.ABC):
+    # Dotted path of the SQLModel table for the telemetry of this module (see DatabaseModule). Resolved lazily, so
+    # loggers do not have to import every module class
+    data_model: Optional[str] = None
+    # Constructor parameters which can be changed at runtime (see reconfigure)
+    reconfigurable: tuple[str, ...] = ("update_frequency",)
+
     def __init__(self, update_frequency: float):
         super().__init__()
         # Config
         self.update_frequency = update_frequency
 
+        # Setup (see utils.parallel_setup)
+        self.setup_dependencies: list[str] = []  # Names of modules which have to be set up before this module
+        self.setup_resources: list[str] = []  # Modules sharing a resource are not set up concurrently
+
+        # Scheduling (see set_schedule_mode)
+        self.schedule_mode = "fixed_delay"
+        self.catch_up_policy = "skip"
+
         # State
         self.is_enabled = True
-        self.last_execution_time = 0
+        self.last_execution_time = 0  # Wall-clock time of last update (only used for telemetry)
+        self.next_due: Optional[float] = None  # Monotonic time of next update (None: immediately)
+        self.phase_offset = 0.
+        self.skipped_updates = 0
         self.last_execution_duration = None
         self._app: Optional["MainBoard"] = None
 
+        # Telemetry routing for sinks (None: everything), see utils.telemetry_routing
+        self.telemetry_origins: Optional[list[str]] = None
+        self.telemetry_fields: Optional[list[str]] = None
+        self.telemetry_exclude_fields: Optional[list[str]] = None
+
+        # Statistics (window grows with the update period, see _create_histograms)
+        self.lateness_histogram, self.duration_histogram = self._create_histograms()
+
+    def _create_histograms(self) -> tuple[RollingHistogram, RollingHistogram]:
+        """ :return Histograms of lateness (start of update - due time) and execution time of updates """
+        return RollingHistogram.for_period(self.update_frequency), RollingHistogram.for_period(self.update_frequency)
+
     def set_name(self, name: str):
         self.__name__ = name
         self.logger = logging.getLogger(f"{self.__class__.__qualname__} ({self.__name__})")
@@ -35,24 +75,79 @@ class GKBaseModule(GKBase, abc.ABC):
         """
         Updates the module if
         - module is enabled
-        - module was not updated in the last `update_frequency` seconds
+        - module is due (see next_execution_time)
 
+        :param t: Wall-clock time passed to `_update` (e.g. used as telemetry timestamp)
         :return True if update function called, otherwise False
         """
-        if self.expects_next_execution(t):
-            try:
-                t1 = time.perf_counter()
-                self._update(t)
-                t2 = time.perf_counter()
-                self.last_execution_duration = t2 - t1
-            except KeyboardInterrupt:
-                raise
-            except BaseException as e:
-                self.logger.error(f"Exception raised in {self.__name__} ({e})")
-            self.last_execution_time = t
+        now = get_monotonic_time()
+        if self.expects_next_execution(now):
+            with self._track_execution(t, now):
+                if self.is_async:
+                    asyncio.run(self._update(t))
+                else:
+                    self._update(t)
             return True
         return False
 
+    async def update_async(self, t: float) -> bool:
+        """
+        Same as `update`, but awaits `_update` for modules with an async `_update`.
+        Must only be called for async modules (see `is_async`).
+        """
+        now = get_monotonic_time()
+        if self.expects_next_execution(now):
+            with self._track_execution(t, now):
+                await self._update(t)
+            return True
+        return False
+
+    @contextmanager
+    def _track_execution(self, t: float, now: float):
+        if self.next_due is not None:
+            self.lateness_histogram.record(now - self.next_execution_time())
+        try:
+            t1 = time.perf_counter()
+            yield
+            t2 = time.perf_counter()
+            self.last_execution_duration = t2 - t1
+            self.duration_histogram.record(self.last_execution_duration)
+        except (KeyboardInterrupt, asyncio.CancelledError):
+            raise
+        except BaseException as e:
+            self.logger.error(f"Exception raised in {self.__name__} ({e})")
+        self.last_execution_time = t
+        self.next_due = self._next_due_after(now)
+
+    @property
+    def period(self) -> float:
+        """ Seconds between updates. `update_frequency`, unless adapted at runtime (see SensorModule) """
+        return self.update_frequency
+
+    def _next_due_after(self, start: float) -> float:
+        """ Next due time after an update started at monotonic time `start` """
+        period = self.period
+        if self.schedule_mode == "fixed_delay" or self.next_due is None:
+            return start + period
+        if start < self.next_due:
+            # Early update (e.g. woken up by a timeline transition) keeps the grid
+            return self.next_due
+
+        # Fixed rate: Next due time is on the nominal grid, independent of lateness and execution time
+        next_due = self.next_due + period
+        now = get_monotonic_time()
+        if next_due <= now and self.catch_up_policy == "skip":
+            missed = math.floor((now - next_due) / period) + 1
+            self.skipped_updates += missed
+            self.logger.debug(f"Skipping {missed} updates")
+            next_due += missed * period
+        return next_due
+
+    @property
+    def is_async(self) -> bool:
+        """ True if the module implements `_update` as coroutine """
+        return inspect.iscoroutinefunction(self._update)
+
     def _update(self, t: float):
         self.logger.debug(f"Update (t={t})")
 
@@ -62,6 +157,10 @@ class GKBaseModule(GKBase, abc.ABC):
     def log_media(self, name: str, data: bytes, origin: "GKBaseModule"):
         pass
 
+    def log_waveform(self, stream: str, samples: "np.ndarray", rate: float, start_time: float, origin: "GKBaseModule"):
+        """ Contiguous `samples` (shape (n, channels)) at `rate` Hz of `stream` starting at `start_time` """
+        pass
+
     def test(self):
         self.logger.info(f"========== Testing {self.__name__}... ==========")
 
@@ -75,6 +174,11 @@ class GKBaseModule(GKBase, abc.ABC):
             "last_execution_time": self.last_execution_time,
             "last_execution_duration": self.last_execution_duration,
             "update_frequency": self.update_frequency,
+            "phase_offset": self.phase_offset,
+            "schedule_mode": self.schedule_mode,
+            "skipped_updates": self.skipped_updates,
+            "lateness": self.lateness_histogram.summary(),  # noqa
+            "execution_duration": self.duration_histogram.summary(),  # noqa
         }
 
     @property
@@ -87,12 +191,70 @@ class GKBaseModule(GKBase, abc.ABC):
     def app_running(self) -> bool:
         return self.app.running
 
-    def expects_next_execution(self, t: float) -> bool:
-        return self.is_enabled and t - self.last_execution_time > self.update_frequency
+    def expects_next_execution(self, now: float) -> bool:
+        """ :param now: Monotonic time (see utils.utils.get_monotonic_time) """
+        return self.is_enabled and now >= self.next_execution_time()
+
+    def next_execution_time(self) -> float:
+        """ Monotonic time at which the module expects its next update """
+        if self.next_due is None:
+            return 0
+        return self.next_due
+
+    def set_phase(self, now: float, phase_offset: float):
+        """ Schedules the first update `phase_offset` seconds after monotonic time `now` """
+        self.phase_offset = phase_offset
+        self.next_due = now + phase_offset
+
+    def set_schedule_mode(self, schedule_mode: str, catch_up_policy: str = "skip"):
+        """
+        :param schedule_mode:
+            `fixed_delay`: Next update is `update_frequency` seconds after the start of the last update
+            `fixed_rate`: Updates are on a fixed grid of `update_frequency` seconds (no drift)
+        :param catch_up_policy: Only for `fixed_rate`, if updates are late by more than one period
+            `skip`: Skip missed updates and continue on the next grid point
+            `catch_up`: Execute missed updates back to back
+        """
+        if schedule_mode not in SCHEDULE_MODES:
+            raise ValueError(f"Unknown schedule mode `{schedule_mode}` (Choose from {SCHEDULE_MODES})")
+        if catch_up_policy not in CATCH_UP_POLICIES:
+            raise ValueError(f"Unknown catch up policy `{catch_up_policy}` (Choose from {CATCH_UP_POLICIES})")
+        self.schedule_mode = schedule_mode
+        self.catch_up_policy = catch_up_policy
+
+    def reconfigure(self, changes: Mapping[str, Any]):
+        """
+        Applies a partial config to the running module (e.g. `reconfigure` telecommand).
+        Only parameters listed in `reconfigurable` can be changed. Modules override `_reconfigure` to rebuild the parts
+        depending on a changed parameter (e.g. a device), everything else keeps running.
+
+        :raise ValueError if any parameter is not reconfigurable (nothing is changed in this case)
+        """
+        unknown = set(changes) - set(self.reconfigurable)
+        if len(unknown) > 0:
+            raise ValueError(
+                f"Cannot reconfigure {sorted(unknown)} of `{self.__name__}` (Reconfigurable: {self.reconfigurable})"
+            )
+        self._reconfigure(changes)
+        self.logger.info(f"Reconfigured `{self.__name__}`: {dict(changes)}")
+
+    def _reconfigure(self, changes: Mapping[str, Any]):
+        for key, value in changes.items():
+            setattr(self, key, value)
+
+        if "update_frequency" in changes:
+            # Statistics restart with a window matching the new period
+            self.lateness_histogram, self.duration_histogram = self._create_histograms()
+        # A shorter update frequency applies immediately instead of after the current period
+        if "update_frequency" in changes and self.next_due is not None:
+            self.next_due = min(self.next_due, get_monotonic_time() + self.period)
 
     def enable(self):
         self.logger.info(f"Module `{self.__name__}` got enabled")
         self.is_enabled = True
+        if self._app is not None:
+            # Disabled modules are not scheduled by the deadline scheduler
+            self._app.request_reschedule()
 
     def disable(self):
         self.logger.warning(f"Module `{self.__name__}` got disabled")
@@ -100,23 +262,122 @@ class GKBaseModule(GKBase, abc.ABC):
 
 
 class TimelineModule(GKBaseModule, abc.ABC):
-    def __init__(self, update_frequency: float, timeline: list["ScheduleItem"]):
+    """
+    Module following a periodic timeline of ScheduleItems. Besides its regular updates, the module gets updated
+    exactly at every transition between two items (see `next_execution_time`).
+    Items with a `ramp` change smoothly from the value of the previous item to their value. Ramps are rendered from
+    a lookup table by a separate thread (see utils.ramp.RampDriver) with `ramp_rate` Hz, which calls `apply_value`.
+    """
+
+    reconfigurable = (*GKBaseModule.reconfigurable, "timeline")
+
+    def __init__(self, update_frequency: float, timeline: list["ScheduleItem"], ramp_rate: float = 20):
         super().__init__(update_frequency)
+        self.ramp_driver = RampDriver(
+            self.__class__.__name__,
+            ramp_at=self.get_ramp_value,
+            next_ramp_time=self.next_transition_time,
+            apply=self.apply_value,
+            rate=ramp_rate,
+        )
+        self.set_timeline(timeline)
+
+    def set_timeline(self, timeline: list["ScheduleItem"]):
+        # Cumulative end offsets of the items for bisect lookup
+        offsets = list(itertools.accumulate(item.duration for item in timeline))
+        if len(offsets) == 0 or offsets[-1] <= 0:
+            raise ValueError(f"Timeline of {self.__name__} needs a positive total duration. Got: {timeline}")
+
+        # Lookup tables of ramps (per item index). Ramps start at the value of the previous item
+        ramp_tables = {}
+        for index, item in enumerate(timeline):
+            ramp = getattr(item, "ramp", None)
+            if ramp is not None and item.duration > 0:
+                ramp_tables[index] = ramp_table(float(timeline[index - 1].value), float(item.value), ramp)
+        if len(ramp_tables) > 0 and not self.supports_ramps:
+            raise ValueError(f"{self.__class__.__name__} does not support ramps (no `apply_value`). Got: {timeline}")
+
         self.timeline = timeline
-        self.total_timeline_duration: float = sum(map(lambda item: item.duration, self.timeline))
+        self._timeline_offsets = offsets
+        self._ramp_tables = ramp_tables
+        self.total_timeline_duration: float = offsets[-1]
+        self.next_transition: Optional[float] = None  # Monotonic time of the next transition
+        self.ramp_driver.wakeup()
 
         self.logger.debug(f"Total timeline duration: {datetime.timedelta(seconds=self.total_timeline_duration)}")
 
-    def get_value_from_schedule(self, t):
+    def setup(self, app: "MainBoard"):
+        super().setup(app)
+        self.ramp_driver.start()
+
+    def destroy(self):
+        super().destroy()
+        self.ramp_driver.stop(timeout=1)
+
+    @property
+    def supports_ramps(self) -> bool:
+        return type(self).apply_value is not TimelineModule.apply_value
+
+    def apply_value(self, value: float):
+        """ Writes a value of the timeline to the device (used by the ramp driver) """
+        raise NotImplementedError(f"{self.__class__.__name__} does not support ramps")
+
+    def _reconfigure(self, changes: Mapping[str, Any]):
+        changes = dict(changes)
+        timeline = changes.pop("timeline", None)
+        if timeline is not None:
+            # Invalid timelines are rejected before any other change is applied
+            self.set_timeline(timeline)
+        super()._reconfigure(changes)
+
+        # Apply the new timeline with the next update
+        if timeline is not None and self.next_due is not None:
+            self.next_due = get_monotonic_time()
+
+    def _timeline_index(self, t: float) -> tuple[int, float]:
+        """ :return Index of the active item at time `t` and the position `t` within the timeline """
         mode_timestamp = t % self.total_timeline_duration
+        # Items are active from their start (inclusive) to their end (exclusive)
+        return bisect.bisect_right(self._timeline_offsets, mode_timestamp), mode_timestamp
+
+    def _ramp_value(self, index: int, mode_timestamp: float) -> float:
+        duration = self.timeline[index].duration
+        start = self._timeline_offsets[index] - duration
+        return lookup(self._ramp_tables[index], (mode_timestamp - start) / duration)
+
+    def get_value_from_schedule(self, t):
+        index, mode_timestamp = self._timeline_index(t)
         self.logger.debug(f"Mode Timestamp: {mode_timestamp}")
-        sum_t = 0
-        for item in self.timeline:
-            sum_t += item.duration
-            if sum_t >= mode_timestamp:
-                return item.value
-
-        raise ValueError(
-            f"Mode not found. This should never happen! "
-            f"Someone messed up the calculation for total_timeline_duration ({self.total_timeline_duration})"
-        )
+        if index in self._ramp_tables:
+            return self._ramp_value(index, mode_timestamp)
+        return self.timeline[index].value
+
+    def get_ramp_value(self, t: float) -> Optional[float]:
+        """ Value at time `t` if a ramp is active, otherwise None """
+        index, mode_timestamp = self._timeline_index(t)
+        if index not in self._ramp_tables:
+            return None
+        return self._ramp_value(index, mode_timestamp)
+
+    def next_transition_time(self, t: float) -> float:
+        """ Time of the first transition between two items after time `t` """
+        index, mode_timestamp = self._timeline_index(t)
+        return t - mode_timestamp + self._timeline_offsets[index]
+
+    def _update(self, t: float):
+        super()._update(t)
+        # `t` is the wall-clock time, the scheduler works on monotonic time
+        now = get_monotonic_time() - (get_time() - t)
+        self.next_transition = now + self.next_transition_time(t) - t
+
+    def next_execution_time(self) -> float:
+        due = super().next_execution_time()
+        if self.next_transition is None:
+            return due
+        return min(due, self.next_transition)
+
+    def status_dict(self) -> dict[str, Union[str, int, float, bool]]:
+        res = super().status_dict()
+        res["ramps"] = len(self._ramp_tables)
+        res["ramp_writes"] = self.ramp_driver.writes
+        return res
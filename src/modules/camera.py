@@ -14,12 +14,15 @@ from picamera2.encoders import H264Encoder
 from picamera2.outputs import FileOutput
 
 from modules import GKBaseModule
-from utils.datatypes import TelemetryType
 from utils.analysis import image_mean_brightness, image_green_proportion
+from utils.motion_channel import MotionEvent
 from utils.utils import get_time, json_dump_compact
 
 
 class CameraModule(GKBaseModule, abc.ABC):
+    data_model = "utils.datamodel.CameraData"
+    reconfigurable = (*GKBaseModule.reconfigurable, "imu_threshold", "min_video_duration", "analyze_images")
+
     def __init__(
             self,
             *,
@@ -56,9 +59,15 @@ class CameraModule(GKBaseModule, abc.ABC):
         self.next_image_filename: Optional[Path] = None
         self.video_until: Optional[float] = None
 
+        self.setup_resources = ["camera"]
+        self.motion_events = 0
+
     def setup(self, app: "MainBoard"):
         super().setup(app)
 
+        # Motion events from the imu trigger videos directly (not via telemetry)
+        app.motion_channel.subscribe(self.on_motion)
+
         # Start camera thread
         self.camera_thread = Thread(target=CameraModule._cam_thread, args=(self,))
         self.camera_thread.start()
@@ -202,20 +211,12 @@ class CameraModule(GKBaseModule, abc.ABC):
 
         camera.stop_recording()
 
-    def log_telemetry(self, data: TelemetryType, origin: "GKBaseModule"):
-        # Only check for imu
-        if origin.__name__ != "imu":
+    def on_motion(self, event: MotionEvent):
+        if not self.is_enabled:
             return
-
-        # Only use motion data from imu
-        if "in_motion" not in data:
-            self.logger.warning("`in_motion` not found in data")
-            return
-
-        # Threshold
-        if data["in_motion"]:
-            self.video_until = get_time() + self.min_video_duration
-            self.logger.info(f"Request video until {self.video_until}")
+        self.motion_events += 1
+        self.video_until = event.time + self.min_video_duration
+        self.logger.info(f"Request video until {self.video_until} (Motion detected by {event.origin})")
 
     def image_analysis_data(self, stream: io.BytesIO):
         # Convert image
@@ -242,6 +243,7 @@ class CameraModule(GKBaseModule, abc.ABC):
         res["video_until"] = self.video_until
         res["images_taken"] = self.images_taken
         res["videos_taken"] = self.videos_taken
+        res["motion_events"] = self.motion_events
         res["analyze_images"] = self.analyze_images
 
         return res
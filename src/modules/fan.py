@@ -1,5 +1,5 @@
 import time
-from typing import Union
+from typing import Union, Mapping, Any
 
 from apis.gpiozero_ext.fan import FanController
 from config import ScheduleItem
@@ -7,14 +7,18 @@ from modules import TimelineModule
 
 
 class FanControllerModule(TimelineModule):
+    data_model = "utils.datamodel.PWMData"
+    reconfigurable = (*TimelineModule.reconfigurable, "pwm_frequency")
+
     def __init__(
             self,
             pwm_pin: str,
             pwm_frequency: float,
             timeline: list[ScheduleItem],
-            update_frequency: float = 10
+            update_frequency: float = 10,
+            ramp_rate: float = 20,
     ):
-        super().__init__(update_frequency=update_frequency, timeline=timeline)
+        super().__init__(update_frequency=update_frequency, timeline=timeline, ramp_rate=ramp_rate)
         self.fan = FanController(
             pwm_pin=pwm_pin,
             pwm_frequency=pwm_frequency,
@@ -63,6 +67,15 @@ class FanControllerModule(TimelineModule):
         self.fan.set_fan(value)
         return value
 
+    def apply_value(self, value: float):
+        self.set_fan(value)
+
+    def _reconfigure(self, changes: Mapping[str, Any]):
+        changes = dict(changes)
+        if "pwm_frequency" in changes:
+            self.fan.pwm.set_frequency(changes.pop("pwm_frequency"))
+        super()._reconfigure(changes)
+
     def status_dict(self) -> dict[str, Union[str, int, float, bool]]:
         res = super().status_dict()
         res["pwm_pin"] = self.fan.pwm_pin
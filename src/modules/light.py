@@ -1,21 +1,26 @@
 import time
-from typing import Union
+from typing import Union, Mapping, Any
 
 from apis.gpiozero_ext.led import LedDevice
 from config import ScheduleItem
 from modules import TimelineModule
+from utils.ramp import ramp_table
 
 
 class LightModule(TimelineModule):
+    data_model = "utils.datamodel.LightPWMData"
+    reconfigurable = (*TimelineModule.reconfigurable, "pwm_frequency")
+
     def __init__(
             self,
             timeline: list[ScheduleItem],
             enable_pin: str,
             pwm_pin: str,
             pwm_frequency: float,
-            update_frequency: float = 30
+            update_frequency: float = 30,
+            ramp_rate: float = 20,
     ):
-        super().__init__(update_frequency=update_frequency, timeline=timeline)
+        super().__init__(update_frequency=update_frequency, timeline=timeline, ramp_rate=ramp_rate)
         self.led = LedDevice(
             pwm_pin=pwm_pin,
             pwm_frequency=pwm_frequency,
@@ -48,26 +53,16 @@ class LightModule(TimelineModule):
         self.led.enable.on()
         self.set_brightness(1)
         time.sleep(1)
-        max_n = 1000
-        # Fade in
-        for i in range(max_n):
-            self.set_brightness(i / max_n)
-            time.sleep(5 / max_n)
-        time.sleep(2)
 
-        # Fade out
-        for i in range(max_n):
-            self.set_brightness(1 - i / max_n)
-            time.sleep(5 / max_n)
+        # Fade in and out
+        self.ramp_driver.play(ramp_table(0, 1), 5)
+        time.sleep(2)
+        self.ramp_driver.play(ramp_table(1, 0), 5)
 
+        fade_in, fade_out = ramp_table(0, 1, "sigmoid"), ramp_table(1, 0, "sigmoid")
         for _ in range(5):
-            max_n = 100
-            for i in range(max_n):
-                self.set_brightness(i / max_n)
-                time.sleep(0.5 / max_n)
-            for i in range(max_n):
-                self.set_brightness(1 - i / max_n)
-                time.sleep(0.5 / max_n)
+            self.ramp_driver.play(fade_in, 0.5)
+            self.ramp_driver.play(fade_out, 0.5)
 
         # Reset to old state
         self.logger.debug(f"TESTING: Reset to {pretest_brightness}")
@@ -86,6 +81,15 @@ class LightModule(TimelineModule):
     def set_brightness(self, value: float):
         self.led.brightness = value
 
+    def apply_value(self, value: float):
+        self.set_brightness(value)
+
+    def _reconfigure(self, changes: Mapping[str, Any]):
+        changes = dict(changes)
+        if "pwm_frequency" in changes:
+            self.led.led_pwm.set_frequency(changes.pop("pwm_frequency"))
+        super()._reconfigure(changes)
+
     def status_dict(self) -> dict[str, Union[str, int, float, bool]]:
         res = super().status_dict()
         res["pwm_pin"] = self.led.led_pwm.pwm_pin
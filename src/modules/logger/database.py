@@ -1,25 +1,18 @@
 from pathlib import Path
-from typing import Type, Optional
+from threading import Lock
+from typing import Type, Optional, Mapping, Union
 
+from hydra.utils import get_class
 from sqlalchemy.engine import Engine
 from sqlmodel import Session, SQLModel
 
 from modules import GKBaseModule
-from modules.camera import CameraModule
-from modules.fan import FanControllerModule
-from modules.light import LightModule
-from modules.sensors.bme680 import BME680Module
-from modules.sensors.co2 import CO2Module
-from modules.sensors.fan_tacho import FanTachoMSPModule, FanTachoRPIModule
-from modules.sensors.imu import IMUModule
-from modules.sensors.internal import RPiTelemetryModule
-from modules.sensors.msp import RebootLogger
-from modules.sensors.o2 import O2Module
-from utils.datamodel import CO2Data, EnvironmentalData, InternalData, FanTachoData, O2Data, MSPRebootData, RestartLog, \
-    IMUData, PWMData, LightPWMData, CameraData
+from utils.datamodel import RestartLog, WaveformData
 from utils.datatypes import TelemetryType
 from utils.utils import get_time
 
+WAVEFORM_STORAGES = ("blob", "npy")
+
 
 class DatabaseModule(GKBaseModule):
     def __init__(
@@ -28,16 +21,40 @@ class DatabaseModule(GKBaseModule):
             engine: Engine,
             media_folder: str,
             update_frequency: float,
-            db_path: Optional[str] = None
+            db_path: Optional[str] = None,
+            waveform_block_duration: float = 10,
+            waveform_storage: str = "blob",
+            waveform_folder: str = "waveforms",
+            waveform_int16_scales: Optional[Mapping[str, float]] = None,
     ):
+        """
+        :param waveform_block_duration: Seconds of samples per stored waveform block
+        :param waveform_storage: `blob`: samples are stored in the database, `npy`: samples are stored as .npy files in
+            `waveform_folder` (relative to the data location) and the database references the file
+        :param waveform_int16_scales: Waveform streams stored as int16 (value = int16 * scale), e.g. {gyro: 0.01}.
+            Other streams are stored as float32
+        """
         super().__init__(update_frequency=update_frequency)
+        if waveform_storage not in WAVEFORM_STORAGES:
+            raise ValueError(f"Unknown waveform storage `{waveform_storage}` (Choose from {WAVEFORM_STORAGES})")
         self.logger.debug(f"Creating Database module with engine: {engine}")
         self.engine = engine
         SQLModel.metadata.create_all(engine)
-        self._data_models = _get_all_datamodels()
+        self._data_models: dict[Type[GKBaseModule], Optional[Type[SQLModel]]] = {}
         self._media_folder = media_folder
         self.media_path: Optional[Path] = None
         self.db_path = db_path
+        self.setup_resources = ["database"]
+
+        # Waveforms
+        self.waveform_block_duration = waveform_block_duration
+        self.waveform_storage = waveform_storage
+        self._waveform_folder = waveform_folder
+        self.waveform_path: Optional[Path] = None
+        self.waveform_int16_scales = dict(waveform_int16_scales or {})
+        self._waveform_buffers: dict[tuple[str, str], "WaveformBuffer"] = {}
+        self._waveform_lock = Lock()
+        self.waveform_blocks = 0
 
     def setup(self, app: "MainBoard"):
         super().setup(app)
@@ -50,8 +67,16 @@ class DatabaseModule(GKBaseModule):
         else:
             self.logger.warning(f"Media folder is None. Disable media logging for {self.__name__}")
 
+        if self.waveform_storage == "npy":
+            self.waveform_path = app.data_location / self._waveform_folder
+            self.waveform_path.mkdir(exist_ok=True, parents=True)
+
         self._log_restart("setup")
 
+    def destroy(self):
+        super().destroy()
+        self.flush_waveforms()
+
     def _log_restart(self, event: str):
         # Log that experiment got started
         with Session(self.engine) as session:
@@ -73,6 +98,13 @@ class DatabaseModule(GKBaseModule):
                 if file.is_file():
                     file.unlink(missing_ok=True)
 
+        # Delete waveforms
+        with self._waveform_lock:
+            self._waveform_buffers.clear()
+        if self.waveform_path is not None:
+            for file in self.waveform_path.rglob("*.npy"):
+                file.unlink(missing_ok=True)
+
         # Delete database
         if self.db_path is not None:
             Path(self.db_path).unlink(missing_ok=True)
@@ -103,8 +135,73 @@ class DatabaseModule(GKBaseModule):
             session.add(row)
             session.commit()
 
+    def log_waveform(self, stream: str, samples: "np.ndarray", rate: float, start_time: float, origin: "GKBaseModule"):
+        # Imported on first use, so NumPy is not loaded at startup
+        from utils.waveform import WaveformBuffer
+
+        with self._waveform_lock:
+            key = (origin.__name__, stream)
+            if key not in self._waveform_buffers:
+                self._waveform_buffers[key] = WaveformBuffer(self.waveform_block_duration)
+            blocks = self._waveform_buffers[key].append(samples, rate, start_time)
+        self._write_waveforms(origin.__name__, stream, blocks)
+
+    def flush_waveforms(self):
+        """ Writes all incomplete waveform blocks """
+        with self._waveform_lock:
+            blocks = [(key, buffer.flush()) for key, buffer in self._waveform_buffers.items()]
+        for (name, stream), block in blocks:
+            if block is not None:
+                self._write_waveforms(name, stream, [block])
+
+    def _write_waveforms(self, name: str, stream: str, blocks: list["Waveform"]):
+        if len(blocks) == 0:
+            return
+        import numpy as np
+        from utils.waveform import encode_samples, npy_path
+
+        scale = self.waveform_int16_scales.get(stream)
+        dtype = "float32" if scale is None else "int16"
+        with Session(self.engine) as session:
+            for block in blocks:
+                encoded = encode_samples(block.samples, dtype, scale)
+                row = WaveformData(
+                    time=block.start_time,
+                    name=name,
+                    stream=stream,
+                    end_time=block.end_time,
+                    rate=block.rate,
+                    samples=encoded.shape[0],
+                    channels=encoded.shape[1],
+                    dtype=dtype,
+                    scale=scale,
+                )
+                if self.waveform_path is not None:
+                    filepath = npy_path(self.waveform_path, name, stream, block.start_time)
+                    filepath.parent.mkdir(exist_ok=True, parents=True)
+                    np.save(filepath, encoded)
+                    row.file_name = str(filepath)
+                else:
+                    row.data = encoded.tobytes()
+                self.logger.debug(f"Adding waveform block: {name}/{stream} ({row.samples} samples at {row.rate}Hz)")
+                session.add(row)
+            session.commit()
+        self.waveform_blocks += len(blocks)
+
+    def read_waveform(
+            self,
+            name: str,
+            stream: str,
+            start: Optional[float] = None,
+            end: Optional[float] = None,
+    ) -> list["Waveform"]:
+        """ Stored blocks of `stream` of module `name` (see utils.waveform.read_waveform and concatenate) """
+        from utils.waveform import read_waveform
+
+        return read_waveform(self.engine, name, stream, start, end)
+
     def parse_telemetry_data(self, data: TelemetryType, origin: "GKBaseModule") -> Optional[SQLModel]:
-        data_class = self._data_models.get(origin.__class__, None)
+        data_class = self.get_data_model(origin)
         if data_class is None:
             return
         if "time" not in data:
@@ -113,6 +210,14 @@ class DatabaseModule(GKBaseModule):
         row = data_class(**data, name=origin.__name__)
         return row
 
+    def get_data_model(self, origin: "GKBaseModule") -> Optional[Type[SQLModel]]:
+        """ Resolves (and caches) the data model declared by the class of `origin` (see GKBaseModule.data_model) """
+        module_class = origin.__class__
+        if module_class not in self._data_models:
+            path = module_class.data_model
+            self._data_models[module_class] = get_class(path) if path is not None else None
+        return self._data_models[module_class]
+
     def copy_database(self, path: str):
         if self.db_path is None:
             self.logger.warning("Cannot copy database, because there is no local path!")
@@ -122,18 +227,9 @@ class DatabaseModule(GKBaseModule):
         path.parent.mkdir(exist_ok=True, parents=True)
         path.write_bytes(Path(self.db_path).read_bytes())
 
-
-def _get_all_datamodels() -> dict[Type[GKBaseModule], Type[SQLModel]]:
-    return {
-        CO2Module: CO2Data,
-        BME680Module: EnvironmentalData,
-        RPiTelemetryModule: InternalData,
-        FanTachoMSPModule: FanTachoData,
-        FanTachoRPIModule: FanTachoData,
-        O2Module: O2Data,
-        RebootLogger: MSPRebootData,
-        IMUModule: IMUData,
-        LightModule: LightPWMData,
-        FanControllerModule: PWMData,
-        CameraModule: CameraData,
-    }
+    def status_dict(self) -> dict[str, Union[str, int, float, bool]]:
+        res = super().status_dict()
+        res["waveform_blocks"] = self.waveform_blocks
+        with self._waveform_lock:
+            res["waveform_streams"] = [f"{name}/{stream}" for name, stream in self._waveform_buffers]  # noqa
+        return res
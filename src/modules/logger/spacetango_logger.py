@@ -47,6 +47,9 @@ class SpaceTangoLogger(GKBaseModule):
         self.stats = {}
         self.reset_stats()
 
+        # Omit image telemetry from camera and scheduler statistics
+        self.telemetry_exclude_fields = ["file_metadata", "file_name", "file_type", "updates_per_second", "module_stats"]
+
     @property
     def serial(self) -> serial.Serial:
         if self._serial is None:
@@ -163,12 +166,6 @@ class SpaceTangoLogger(GKBaseModule):
             self._serial.close()
 
     def log_telemetry(self, data: TelemetryType, origin: "GKBaseModule"):
-        # Omit image telemetry from camera
-        if origin.__name__ == "camera":
-            data.pop("file_metadata")
-            data.pop("file_name")
-            data.pop("file_type")
-
         # Get timestamp
         if "time" not in data:
             self.logger.warning(f"Time not found in data for {origin.__name__}. Adding own timestamp.")
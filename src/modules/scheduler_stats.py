@@ -0,0 +1,34 @@
+from typing import Union
+
+from modules import GKBaseModule
+from utils.utils import json_dump_compact
+
+
+class SchedulerStatsModule(GKBaseModule):
+    """
+    Periodically logs lateness and execution duration percentiles of all modules as telemetry.
+    The statistics are logged as one JSON field (`module_stats`) keyed by module name.
+    """
+
+    data_model = "utils.datamodel.SchedulerStatsData"
+
+    def __init__(self, update_frequency: float = 300):
+        super().__init__(update_frequency=update_frequency)
+
+    def _update(self, t: float):
+        super()._update(t)
+        module_stats: dict[str, dict[str, Union[int, float]]] = {}
+        for module in self.app.modules:
+            stats = module_stats[module.__name__] = {}
+            for name, histogram in [("lateness", module.lateness_histogram), ("duration", module.duration_histogram)]:
+                for key, value in histogram.summary().items():
+                    if isinstance(value, float):
+                        value = float(f"{value:.4g}")
+                    if value is not None:
+                        stats[f"{name}_{key}"] = value
+
+        self.app.log_telemetry({
+            "time": t,
+            "updates_per_second": self.app.updates_per_second,
+            "module_stats": json_dump_compact(module_stats),
+        }, self)
@@ -1,17 +1,27 @@
 import abc
 import json
 from pathlib import Path
-from typing import Union, Optional
+from typing import Union, Optional, Mapping, Any
 
 from modules import GKBaseModule
+from utils.adaptive_sampling import AdaptiveSampling
 from utils.datatypes import TelemetryType
 
 
 class SensorModule(GKBaseModule, abc.ABC):
-    def __init__(self, update_frequency: float, calibration_file: Optional[Union[Path, str]] = None):
+    reconfigurable = (*GKBaseModule.reconfigurable, "calibration_file", "adaptive_sampling")
+
+    def __init__(
+            self,
+            update_frequency: float,
+            calibration_file: Optional[Union[Path, str]] = None,
+            adaptive_sampling: Optional[AdaptiveSampling] = None,
+    ):
         super().__init__(update_frequency)
         self.latest_data = {}
         self.calibration_file = None if calibration_file is None else Path(calibration_file)
+        self.adaptive_sampling = adaptive_sampling
+        self._adaptive_period: Optional[float] = None  # Seconds between updates chosen by `adaptive_sampling`
 
     @property
     def calibration_data(self) -> dict:
@@ -22,9 +32,34 @@ class SensorModule(GKBaseModule, abc.ABC):
                 self.logger.warning(f"Calibration file at {Path(self.calibration_file)} does not exist!")
         return {}
 
+    def apply_calibration(self):
+        """ Applies `calibration_data` to the sensor. Called after `calibration_file` got reconfigured """
+        pass
+
+    @property
+    def period(self) -> float:
+        if self.adaptive_sampling is not None and self._adaptive_period is not None:
+            return self._adaptive_period
+        return self.update_frequency
+
+    def _reconfigure(self, changes: Mapping[str, Any]):
+        changes = dict(changes)
+        if changes.get("calibration_file") is not None:
+            changes["calibration_file"] = Path(changes["calibration_file"])
+        if "update_frequency" in changes or "adaptive_sampling" in changes:
+            # Adapt again starting from the configured update frequency
+            self._adaptive_period = None
+        super()._reconfigure(changes)
+
+        if "calibration_file" in changes and self._app is not None:
+            self.apply_calibration()
+
     def status_dict(self) -> dict[str, Union[str, int, float, bool]]:
         res = super().status_dict()
         res["sensor_data"] = self.latest_data # noqa
+        if self.adaptive_sampling is not None:
+            res["adaptive_sampling"] = self.adaptive_sampling.status_dict()  # noqa
+            res["adaptive_period"] = self.period
         return res
 
     def test(self):
@@ -34,12 +69,19 @@ class SensorModule(GKBaseModule, abc.ABC):
 
     def _update(self, t: float):
         self.latest_data = self.sample()
+        self._publish_sample(t)
+
+    def _publish_sample(self, t: float):
+        """ Logs `latest_data` as telemetry and adapts the sampling interval """
         self.logger.info(self.latest_data)
         data = self.latest_data
         if "time" not in data:
             data["time"] = t
         self.app.log_telemetry(data, self)
 
+        if self.adaptive_sampling is not None:
+            self._adaptive_period = self.adaptive_sampling.next_update_frequency(data, t, self.period)
+
     @abc.abstractmethod
     def sample(self) -> TelemetryType:
         """ Samples values and returns values as dictionary[name -> value]"""
@@ -1,31 +1,44 @@
 from pathlib import Path
 from typing import Union, Optional
 
+from apis.i2c_modules import i2c_resource
 from apis.i2c_modules.bme680_lib import BME680
 from modules.sensors import SensorModule
+from utils.adaptive_sampling import AdaptiveSampling
 
 
 class BME680Module(SensorModule):
+    data_model = "utils.datamodel.EnvironmentalData"
+
     def __init__(
             self,
             *,
             i2c_address: int,
             update_frequency: float = 10,
-            calibration_file: Optional[Union[Path, str]] = None
+            calibration_file: Optional[Union[Path, str]] = None,
+            adaptive_sampling: Optional[AdaptiveSampling] = None,
     ):
-        super().__init__(update_frequency=update_frequency, calibration_file=calibration_file)
+        super().__init__(
+            update_frequency=update_frequency,
+            calibration_file=calibration_file,
+            adaptive_sampling=adaptive_sampling,
+        )
         self.i2c_address = i2c_address
         self._bme680: Optional[BME680] = None
+        self.setup_resources = [i2c_resource(i2c_address)]
 
     def setup(self, app: "MainBoard"):
         super().setup(app)
 
         self._bme680 = BME680(self.i2c_address, smbus=app.smbus)
+        self.apply_calibration()
+
+    def apply_calibration(self):
         calibration_data = {
             "value": 0
         }
         calibration_data.update(self.calibration_data)
-        self._bme680.sensor.set_temp_offset(**calibration_data)
+        self.bme680.sensor.set_temp_offset(**calibration_data)
 
     @property
     def bme680(self) -> BME680:
@@ -1,19 +1,25 @@
 from typing import Union, Optional
 
+from apis.i2c_modules import i2c_resource
 from apis.i2c_modules.ee895 import EE895
 from modules.sensors import SensorModule
+from utils.adaptive_sampling import AdaptiveSampling
 
 
 class CO2Module(SensorModule):
+    data_model = "utils.datamodel.CO2Data"
+
     def __init__(
             self,
             *,
             i2c_address: int,
-            update_frequency: int = 10
+            update_frequency: int = 10,
+            adaptive_sampling: Optional[AdaptiveSampling] = None,
     ):
-        super().__init__(update_frequency=update_frequency)
+        super().__init__(update_frequency=update_frequency, adaptive_sampling=adaptive_sampling)
         self.i2c_address = i2c_address
         self.ee895: Optional[EE895] = None
+        self.setup_resources = [i2c_resource(i2c_address)]
 
     def setup(self, app: "MainBoard"):
         super().setup(app)
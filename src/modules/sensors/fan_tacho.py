@@ -1,12 +1,15 @@
 from typing import Optional
 
 from apis.gpiozero_ext.fan import FanTacho
+from apis.i2c_modules import i2c_resource
 from apis.i2c_modules.msplib import MSP
 from modules.sensors import SensorModule
 from utils.datatypes import TelemetryType
 
 
 class FanTachoRPIModule(SensorModule):
+    data_model = "utils.datamodel.FanTachoData"
+
     def __init__(
             self,
             *,
@@ -34,6 +37,8 @@ class FanTachoRPIModule(SensorModule):
 
 
 class FanTachoMSPModule(SensorModule):
+    data_model = "utils.datamodel.FanTachoData"
+
     def __init__(
             self,
             *,
@@ -44,6 +49,7 @@ class FanTachoMSPModule(SensorModule):
         self.logger.debug(f"Initializing FanTacho over MSP with address 0x{msp_address:x}")
         self.msp_address = msp_address
         self.msp: Optional[MSP] = None
+        self.setup_resources = [i2c_resource(msp_address)]
 
     def setup(self, app: "MainBoard"):
         super().setup(app)
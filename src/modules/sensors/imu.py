@@ -1,14 +1,26 @@
 import math
+from dataclasses import asdict
 from pathlib import Path
-from typing import Optional, Union
+from typing import Optional, Union, Mapping, Any, Callable
 
-from apis.i2c_modules.MPU6500 import MPU6500
+import numpy as np
+
+from apis.i2c_modules import i2c_resource
+from apis.i2c_modules.MPU6500 import MPU6500, FIFO_SIZE, FIFO_FRAME_SIZE
 from modules.sensors import SensorModule
-from utils.analysis import imu_in_motion
 from utils.datatypes import TelemetryType
+from utils.motion import MotionDetector
+from utils.motion_channel import MotionEvent, MotionFeatures
+from utils.utils import get_time
 
 
 class IMUModule(SensorModule):
+    data_model = "utils.datamodel.IMUData"
+    reconfigurable = (
+        *SensorModule.reconfigurable, "imu_motion_threshold", "motion_std_threshold", "motion_window", "fifo_rate",
+        "record_waveform",
+    )
+
     def __init__(
             self,
             *,
@@ -16,29 +28,150 @@ class IMUModule(SensorModule):
             update_frequency: float = 1,
             calibration_file: Optional[Union[Path, str]] = None,
             imu_motion_threshold: float = 1.5,
+            motion_std_threshold: float = 0.5,
+            motion_window: float = 2,
+            fifo_rate: Optional[float] = None,
+            record_waveform: bool = False,
     ):
+        """
+        :param imu_motion_threshold: Change of acceleration (m/s^2) between consecutive samples detected as motion
+        :param motion_std_threshold: Standard deviation of the acceleration (m/s^2) within `motion_window`
+            seconds detected as motion. Needs at least 8 samples, without FIFO the window is extended to 8 updates
+            (see MotionDetector.for_rate)
+        :param fifo_rate: Sample rate (Hz) of the on-chip FIFO. Every update drains all samples since the last update.
+            If None, every update reads one sample
+        :param record_waveform: Logs all FIFO samples as waveforms (streams `acceleration` and `gyro`, see log_waveform)
+        """
         super().__init__(update_frequency=update_frequency, calibration_file=calibration_file)
         self.i2c_address = i2c_address
         self.imu: Optional[MPU6500] = None
         self.imu_motion_threshold = imu_motion_threshold
+        self.motion_std_threshold = motion_std_threshold
+        self.motion_window = motion_window
+        self.fifo_rate = fifo_rate
+        self.record_waveform = record_waveform
+        self.setup_resources = [i2c_resource(i2c_address)]
+
+        self.motion_detector = self._create_motion_detector()
+        self.motion: Optional[MotionFeatures] = None
 
-        self._old_vector = 0, 0, 0
+        # Called with every batch of acceleration samples (shape (n, 3)) and its sample rate (e.g. vibration analysis)
+        self.batch_listeners: list[Callable[[np.ndarray, float], None]] = []
+
+        # Preallocated FIFO batch (filled by MPU6500.read_fifo)
+        self._accel = np.zeros((FIFO_SIZE // FIFO_FRAME_SIZE, 3), dtype=np.float32)
+        self._gyro = np.zeros((FIFO_SIZE // FIFO_FRAME_SIZE, 3), dtype=np.float32)
+        self._batch_size = 0
+        self.fifo_samples = 0
 
     def setup(self, app: "MainBoard"):
         super().setup(app)
-        self.imu = MPU6500(self.i2c_address, smbus=app.smbus, **self.calibration_data)
+        self.apply_calibration()
+
+    def apply_calibration(self):
+        # Calibration is part of the device configuration
+        self.imu = MPU6500(self.i2c_address, smbus=self.app.smbus, **self.calibration_data)
+        self._configure_fifo()
+
+    def _configure_fifo(self):
+        self._batch_size = 0
+        if self.fifo_rate is None:
+            return
+        rate = self.imu.configure_fifo(self.fifo_rate)
+        max_period = FIFO_SIZE // FIFO_FRAME_SIZE / rate
+        if self.update_frequency > max_period:
+            self.logger.warning(
+                f"FIFO holds {max_period:.2f}s at {rate:.1f}Hz, but update period is {self.update_frequency:.2f}s"
+                f" (FIFO overflows)"
+            )
+
+    def _create_motion_detector(self) -> MotionDetector:
+        rate = self.fifo_rate if self.fifo_rate is not None else 1 / self.update_frequency
+        detector = MotionDetector.for_rate(
+            self.motion_window,
+            rate,
+            jerk_threshold=self.imu_motion_threshold,
+            std_threshold=self.motion_std_threshold,
+        )
+        if detector.window > math.ceil(self.motion_window * rate):
+            self.logger.warning(
+                f"motion_window of {self.motion_window}s holds less than {detector.min_std_samples} samples at"
+                f" {rate:.2f}Hz, the standard deviation is tested over the last {detector.window / rate:.1f}s"
+                f" (set fifo_rate for a shorter window)"
+            )
+        return detector
+
+    def _reconfigure(self, changes: Mapping[str, Any]):
+        super()._reconfigure(changes)
+        if "fifo_rate" in changes and "calibration_file" not in changes and self.imu is not None:
+            self._configure_fifo()
+        if len(changes.keys() & {"imu_motion_threshold", "motion_std_threshold", "motion_window", "fifo_rate",
+                                 "update_frequency"}) > 0:
+            self.motion_detector = self._create_motion_detector()
+
+    def _publish_batch(self, accel: np.ndarray, rate: float):
+        for listener in self.batch_listeners:
+            try:
+                listener(accel, rate)
+            except BaseException as e:
+                self.logger.error(f"Error in batch listener {listener} ({e})")
+
+    def _detect_motion(self, samples: np.ndarray) -> bool:
+        """ Updates the motion detector and publishes motion to the motion channel (e.g. camera) """
+        self.motion = self.motion_detector.update(samples)
+        if self.motion.in_motion and self._app is not None:
+            self.app.motion_channel.publish(MotionEvent(get_time(), self.__name__, self.motion))
+        return self.motion.in_motion
+
+    @property
+    def batch(self) -> tuple[np.ndarray, np.ndarray]:
+        """ Acceleration and gyro samples (shape (n, 3)) of the latest FIFO batch """
+        return self._accel[:self._batch_size], self._gyro[:self._batch_size]
 
     def sample(self) -> TelemetryType:
-        ax, ay, az = self.imu.acceleration
-        gyro = self.imu.gyro
-        temperature = self.imu.temperature
-        total_acc = math.sqrt(ax ** 2 + ay ** 2 + az ** 2)
+        if self.fifo_rate is not None:
+            return self._sample_fifo()
+        return self._sample_single()
 
-        # Update in motion
-        new_vector = ax, ay, az
-        in_motion = imu_in_motion(self._old_vector, new_vector, self.imu_motion_threshold)
-        in_motion = in_motion or total_acc >= 30
-        self._old_vector = new_vector
+    def _sample_fifo(self) -> TelemetryType:
+        self._batch_size = self.imu.read_fifo(self._accel, self._gyro)
+        if self._batch_size == 0:
+            # Nothing in FIFO (e.g. after overflow): The motion detector and batch listeners expect samples at the
+            # FIFO rate, so the snapshot is only reported
+            return self._read_snapshot(in_motion=self.motion is not None and self.motion.in_motion)
+        self.fifo_samples += self._batch_size
+        accel, gyro = self.batch
+        ax, ay, az = (float(v) for v in accel.mean(axis=0))
+        gx, gy, gz = (float(v) for v in gyro.mean(axis=0))
+        in_motion = self._detect_motion(accel)
+        self._publish_batch(accel, self.imu.fifo_rate)
+        if self.record_waveform:
+            start_time = get_time() - self._batch_size / self.imu.fifo_rate
+            self.app.log_waveform("acceleration", accel.copy(), self.imu.fifo_rate, start_time, self)
+            self.app.log_waveform("gyro", gyro.copy(), self.imu.fifo_rate, start_time, self)
+
+        return {
+            "ax": ax,
+            "ay": ay,
+            "az": az,
+            "a": float(np.linalg.norm(accel, axis=1).mean()),
+            "gx": gx,
+            "gy": gy,
+            "gz": gz,
+            "temperature": self.imu.temperature,
+            "in_motion": in_motion
+        }
+
+    def _sample_single(self) -> TelemetryType:
+        data = self._read_snapshot()
+        samples = np.array([[data["ax"], data["ay"], data["az"]]], dtype=np.float32)
+        data["in_motion"] = self._detect_motion(samples)
+        self._publish_batch(samples, 1 / self.update_frequency)
+        return data
+
+    def _read_snapshot(self, in_motion: bool = False) -> TelemetryType:
+        (ax, ay, az), gyro, temperature = self.imu.read_snapshot()
+        total_acc = math.sqrt(ax ** 2 + ay ** 2 + az ** 2)
 
         return {
             "ax": ax,
@@ -51,3 +184,15 @@ class IMUModule(SensorModule):
             "temperature": temperature,
             "in_motion": in_motion
         }
+
+    def status_dict(self) -> dict[str, Union[str, int, float, bool]]:
+        res = super().status_dict()
+        if self.imu is not None and self.imu.fifo_rate is not None:
+            res["fifo"] = {  # noqa
+                "rate": self.imu.fifo_rate,
+                "samples": self.fifo_samples,
+                "batch_size": self._batch_size,
+                "overflows": self.imu.fifo_overflows,
+            }
+        res["motion"] = asdict(self.motion) if self.motion is not None else None  # noqa
+        return res
@@ -9,6 +9,8 @@ from modules.sensors import SensorModule
 
 
 class RPiTelemetryModule(SensorModule):
+    data_model = "utils.datamodel.InternalData"
+
     @staticmethod
     def get_cpu_temp() -> float:
         # https://helloacm.com/how-to-monitor-the-cpu-temperature-of-raspberry-pi-using-python-script/
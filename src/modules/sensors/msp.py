@@ -1,12 +1,15 @@
 from typing import Optional
 
 from apis.gpiozero_ext.fan import FanTacho
+from apis.i2c_modules import i2c_resource
 from apis.i2c_modules.msplib import MSP
 from modules.sensors import SensorModule
 from utils.datatypes import TelemetryType
 
 
 class RebootLogger(SensorModule):
+    data_model = "utils.datamodel.MSPRebootData"
+
     def __init__(
             self,
             *,
@@ -17,6 +20,7 @@ class RebootLogger(SensorModule):
         self.logger.debug(f"Initializing RebootLogger with address 0x{msp_address:x}")
         self.msp_address = msp_address
         self.msp: Optional[MSP] = None
+        self.setup_resources = [i2c_resource(msp_address)]
 
     def setup(self, app: "MainBoard"):
         super().setup(app)
@@ -1,10 +1,14 @@
 from typing import Union, Optional
 
+from apis.i2c_modules import i2c_resource
 from apis.i2c_modules.o2 import TB200B
 from modules.sensors import SensorModule
+from utils.adaptive_sampling import AdaptiveSampling
 
 
 class O2Module(SensorModule):
+    data_model = "utils.datamodel.O2Data"
+
     def __init__(
             self,
             *,
@@ -12,14 +16,20 @@ class O2Module(SensorModule):
             uart_buffer_size: int = 13,
             await_uart_timeout: float = 5,
             uart_ready_delay: float = 0.1,
-            update_frequency: int = 10
+            uart_min_delay: float = 0.005,
+            uart_ready_pin: Optional[str] = None,
+            update_frequency: int = 10,
+            adaptive_sampling: Optional[AdaptiveSampling] = None,
     ):
-        super().__init__(update_frequency=update_frequency)
+        super().__init__(update_frequency=update_frequency, adaptive_sampling=adaptive_sampling)
         self.msp_address = msp_address
         self.await_uart_timeout = await_uart_timeout
         self.uart_buffer_size = uart_buffer_size
         self.uart_ready_delay = uart_ready_delay
+        self.uart_min_delay = uart_min_delay
+        self.uart_ready_pin = uart_ready_pin
         self.tb200b: Optional[TB200B] = None
+        self.setup_resources = [i2c_resource(msp_address)]
 
     def setup(self, app: "MainBoard"):
         super().setup(app)
@@ -28,6 +38,8 @@ class O2Module(SensorModule):
             await_uart_timeout=self.await_uart_timeout,
             uart_buffer_size=self.uart_buffer_size,
             uart_ready_delay=self.uart_ready_delay,
+            uart_min_delay=self.uart_min_delay,
+            uart_ready_pin=self.uart_ready_pin,
             smbus=app.smbus
         )
 
@@ -40,7 +52,15 @@ class O2Module(SensorModule):
             self.logger.info(f"New light state: {light_state}")
 
     def sample(self) -> dict[str, Union[float, int]]:
-        o2, range_, o2_ppb, temperature, humidity = self.tb200b.read_data()
+        return self._result(*self.tb200b.read_data())
+
+    async def _update(self, t: float):
+        # Awaits the UART round trip, so the asyncio scheduler runs other modules meanwhile
+        self.latest_data = self._result(*await self.tb200b.read_data_async())
+        self._publish_sample(t)
+
+    @staticmethod
+    def _result(o2: int, range_: int, o2_ppb: int, temperature: float, humidity: float) -> dict[str, Union[float, int]]:
         result = {
             "o2": o2,
             "o2_ppb": o2_ppb,
@@ -48,3 +68,9 @@ class O2Module(SensorModule):
             "humidity": humidity,
         }
         return result
+
+    def status_dict(self) -> dict[str, Union[str, int, float, bool]]:
+        res = super().status_dict()
+        if self.tb200b is not None:
+            res["uart"] = self.tb200b.msp.uart_status_dict()  # noqa
+        return res
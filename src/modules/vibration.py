@@ -0,0 +1,133 @@
+from threading import Lock
+from typing import Optional, Sequence, Union, Mapping, Any
+
+import numpy as np
+
+from modules import GKBaseModule
+from utils.vibration import vibration_spectrum
+from utils.utils import get_time, json_dump_compact
+
+AXES = ("x", "y", "z")
+
+
+class VibrationModule(GKBaseModule):
+    """
+    Summarizes the vibration seen by an IMU module (`source`) instead of logging its raw samples.
+    The acceleration batches of the IMU (see IMUModule.batch_listeners) are collected into windows of `window` samples.
+    Every update logs one entry per complete window with RMS, peak, dominant frequency and power per frequency band
+    for each axis. Frequencies up to half the sample rate are resolved, so the IMU should sample via its FIFO.
+    """
+
+    data_model = "utils.datamodel.VibrationData"
+    reconfigurable = (*GKBaseModule.reconfigurable, "bands")
+
+    def __init__(
+            self,
+            *,
+            update_frequency: float = 5,
+            source: str = "imu",
+            window: int = 256,
+            bands: Sequence[Sequence[float]] = ((0, 2), (2, 5), (5, 10), (10, 20)),
+            buffered_windows: int = 4,
+    ):
+        """
+        :param window: Samples per spectrum
+        :param bands: Frequency bands [low, high) in Hz
+        :param buffered_windows: Samples of this many windows are buffered between updates. The oldest samples are
+            dropped if more arrive
+        """
+        super().__init__(update_frequency=update_frequency)
+        self.source = source
+        self.window = window
+        self.bands = [(float(low), float(high)) for low, high in bands]
+        self.setup_dependencies = [source]
+
+        self._buffer = np.zeros((window * max(buffered_windows, 1), 3), dtype=np.float32)
+        self._count = 0
+        self._rate: Optional[float] = None
+        self._last_sample_time = 0.
+        self._lock = Lock()
+        self._source_module: Optional[GKBaseModule] = None
+
+        self.windows = 0
+        self.dropped_samples = 0
+
+    def setup(self, app: "MainBoard"):
+        super().setup(app)
+        source = app.get_module(self.source)
+        if source is None or not hasattr(source, "batch_listeners"):
+            raise RuntimeError(f"Module `{self.source}` does not provide acceleration batches")
+        if getattr(source, "fifo_rate", None) is None:
+            self.logger.warning(f"`{self.source}` samples without FIFO. Spectra only cover very low frequencies")
+        source.batch_listeners.append(self.add_samples)
+        self._source_module = source
+
+    def destroy(self):
+        super().destroy()
+        if self._source_module is not None and self.add_samples in self._source_module.batch_listeners:
+            self._source_module.batch_listeners.remove(self.add_samples)
+
+    def _reconfigure(self, changes: Mapping[str, Any]):
+        changes = dict(changes)
+        if "bands" in changes:
+            changes["bands"] = [(float(low), float(high)) for low, high in changes["bands"]]
+        super()._reconfigure(changes)
+
+    def add_samples(self, samples: np.ndarray, rate: float):
+        """ Appends acceleration `samples` (shape (n, 3)) sampled at `rate` Hz (called by the source module) """
+        with self._lock:
+            if rate != self._rate:
+                # Windows must not mix sample rates
+                self._count = 0
+                self._rate = rate
+
+            n = min(len(samples), len(self._buffer))
+            overflow = self._count + n - len(self._buffer)
+            if overflow > 0:
+                self._drop(overflow)
+                self.dropped_samples += overflow
+            self._buffer[self._count:self._count + n] = samples[len(samples) - n:]
+            self._count += n
+            self._last_sample_time = get_time()
+
+    def _drop(self, n: int):
+        """ Removes the oldest `n` samples from the buffer """
+        self._buffer[:self._count - n] = self._buffer[n:self._count]
+        self._count -= n
+
+    def _update(self, t: float):
+        super()._update(t)
+        while True:
+            with self._lock:
+                if self._count < self.window:
+                    break
+                samples = self._buffer[:self.window].copy()
+                rate = self._rate
+                start_time = self._last_sample_time - (self._count - 1) / rate
+                self._drop(self.window)
+            self._log_window(start_time, samples, rate)
+
+    def _log_window(self, t: float, samples: np.ndarray, rate: float):
+        bands = list(self.bands)
+        spectrum = vibration_spectrum(samples, rate, bands)
+        data: dict[str, Union[str, int, float]] = {"time": t, "rate": rate, "samples": len(samples)}
+        band_power: dict[str, list] = {"bands": [list(band) for band in bands]}
+        for i, axis in enumerate(AXES):
+            data[f"rms_{axis}"] = float(spectrum["rms"][i])
+            data[f"peak_{axis}"] = float(spectrum["peak"][i])
+            data[f"frequency_{axis}"] = float(spectrum["frequency"][i])
+            band_power[axis] = [float(f"{power:.4g}") for power in spectrum["band_power"][:, i]]
+        data["band_power"] = json_dump_compact(band_power)
+
+        self.windows += 1
+        self.app.log_telemetry(data, self)
+
+    def status_dict(self) -> dict[str, Union[str, int, float, bool]]:
+        res = super().status_dict()
+        with self._lock:
+            res["buffered_samples"] = self._count
+            res["rate"] = self._rate
+        res["windows"] = self.windows
+        res["dropped_samples"] = self.dropped_samples
+        res["bands"] = self.bands  # noqa
+        return res
@@ -0,0 +1,81 @@
+import math
+import statistics
+from collections import deque
+from typing import Optional, Mapping, Union
+
+from utils.datatypes import TelemetryType
+
+
+class AdaptiveSampling:
+    """
+    Adapts the update frequency (seconds between samples) of a sensor to its signal.
+    - If the rate of change (per second) or the standard deviation over the last `window` samples of any configured
+      field exceeds its threshold, the sensor is sampled every `fast_update_frequency` seconds.
+    - Otherwise, the time between samples grows by `backoff` per sample up to `slow_update_frequency` seconds.
+    """
+
+    def __init__(
+            self,
+            *,
+            fast_update_frequency: float,
+            slow_update_frequency: float,
+            rate_thresholds: Optional[Mapping[str, float]] = None,
+            std_thresholds: Optional[Mapping[str, float]] = None,
+            window: int = 5,
+            backoff: float = 1.5,
+    ):
+        if fast_update_frequency > slow_update_frequency:
+            raise ValueError(
+                f"fast_update_frequency ({fast_update_frequency}) has to be <= "
+                f"slow_update_frequency ({slow_update_frequency})"
+            )
+        if backoff < 1:
+            raise ValueError(f"backoff has to be >= 1. Got: {backoff}")
+
+        self.fast_update_frequency = fast_update_frequency
+        self.slow_update_frequency = slow_update_frequency
+        self.rate_thresholds = dict(rate_thresholds or {})
+        self.std_thresholds = dict(std_thresholds or {})
+        self.window = window
+        self.backoff = backoff
+
+        self._history: dict[str, deque[tuple[float, float]]] = {
+            field: deque(maxlen=window) for field in {*self.rate_thresholds, *self.std_thresholds}
+        }
+        self.active_fields: list[str] = []
+
+    def next_update_frequency(self, data: TelemetryType, t: float, update_frequency: float) -> float:
+        """ Adds sample `data` taken at time `t` and returns the update frequency for the next sample """
+        self.active_fields = []
+        for field, history in self._history.items():
+            value = data.get(field)
+            if not isinstance(value, (int, float)) or math.isnan(value):
+                continue
+            history.append((t, float(value)))
+            if self._is_active(field, history):
+                self.active_fields.append(field)
+
+        if len(self.active_fields) > 0:
+            return self.fast_update_frequency
+        return min(max(update_frequency * self.backoff, self.fast_update_frequency), self.slow_update_frequency)
+
+    def _is_active(self, field: str, history: deque[tuple[float, float]]) -> bool:
+        if len(history) < 2:
+            return False
+
+        (t1, v1), (t2, v2) = history[-2], history[-1]
+        rate_threshold = self.rate_thresholds.get(field)
+        if rate_threshold is not None and t2 > t1 and abs(v2 - v1) / (t2 - t1) > rate_threshold:
+            return True
+
+        std_threshold = self.std_thresholds.get(field)
+        if std_threshold is not None and statistics.pstdev(v for _, v in history) > std_threshold:
+            return True
+        return False
+
+    def status_dict(self) -> dict[str, Union[str, int, float, bool]]:
+        return {
+            "fast_update_frequency": self.fast_update_frequency,
+            "slow_update_frequency": self.slow_update_frequency,
+            "active_fields": self.active_fields,  # noqa
+        }
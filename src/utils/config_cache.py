@@ -0,0 +1,99 @@
+import hashlib
+import os
+import pickle
+import sys
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional, Sequence, Any
+
+from omegaconf import DictConfig, OmegaConf
+
+CACHE_ENV = "GK_CONFIG_CACHE"  # Path of the compiled config cache. Caching is deactivated if not set
+
+
+@dataclass
+class CompiledConfig:
+    key: str
+    cfg: DictConfig  # Composed config (interpolations are resolved lazily by instantiate)
+    config_yaml: str
+    job_name: str
+    job_logging: Optional[dict[str, Any]]  # Unresolved, as it contains the current time (`now` resolver)
+    verbose: Any = False
+
+    def configure_logging(self):
+        """ Configures logging like hydra.main does for a composed config """
+        from hydra.core.utils import configure_log, setup_globals
+
+        setup_globals()  # Registers the `now` resolver
+        if self.job_logging is None:
+            configure_log(None, self.verbose)
+            return
+        root = OmegaConf.create({"hydra": {"job": {"name": self.job_name}}, "job_logging": self.job_logging})
+        configure_log(root.job_logging, self.verbose)
+
+
+class ConfigCache:
+    """
+    Caches the composed hydra config, so a restart with unchanged config skips the hydra composition.
+    The cache key is a hash of all files in `config_dir`, the file defining the custom resolvers and the command line
+    arguments (config name and overrides). Other hydra command line flags (e.g. --help, --multirun) deactivate caching.
+    """
+
+    def __init__(self, path: Optional[str], config_dir: Path, args: Sequence[str], resolver_file: Path):
+        self.path = Path(path) if path else None
+        self.key: Optional[str] = None
+        if self.path is not None and self._cacheable(args):
+            self.key = self.compute_key(config_dir, args, resolver_file)
+
+    @property
+    def enabled(self) -> bool:
+        return self.key is not None
+
+    @staticmethod
+    def _cacheable(args: Sequence[str]) -> bool:
+        return all(not arg.startswith("-") or arg.startswith("--config-name=") for arg in args)
+
+    @staticmethod
+    def compute_key(config_dir: Path, args: Sequence[str], resolver_file: Path) -> str:
+        h = hashlib.sha256()
+        h.update(sys.version.encode())
+        for file in sorted(path for path in config_dir.rglob("*") if path.is_file()):
+            h.update(str(file.relative_to(config_dir)).encode())
+            h.update(file.read_bytes())
+        h.update(resolver_file.read_bytes())
+        for arg in args:
+            h.update(b"\0" + arg.encode())
+        return h.hexdigest()
+
+    def load(self) -> Optional[CompiledConfig]:
+        """ :return Compiled config if the cache exists and matches the current config, otherwise None """
+        if not self.enabled or not self.path.is_file():
+            return None
+        try:
+            compiled = pickle.loads(self.path.read_bytes())
+        except Exception:
+            # Invalid or outdated cache. It is overwritten after the next composition
+            return None
+        if not isinstance(compiled, CompiledConfig) or compiled.key != self.key:
+            return None
+        return compiled
+
+    def save(self, cfg: DictConfig, config_yaml: str, hydra_cfg: DictConfig):
+        """ Saves the composed config `cfg` with the logging configuration of the hydra runtime config `hydra_cfg` """
+        if not self.enabled:
+            return
+        verbose = hydra_cfg.get("verbose", False)
+        compiled = CompiledConfig(
+            key=self.key,
+            cfg=cfg,
+            config_yaml=config_yaml,
+            job_name=hydra_cfg.job.name,
+            job_logging=OmegaConf.to_container(hydra_cfg.job_logging, resolve=False),
+            verbose=OmegaConf.to_container(verbose) if OmegaConf.is_config(verbose) else verbose,
+        )
+
+        # Write atomically, so a reboot while writing does not corrupt the cache
+        self.path.parent.mkdir(exist_ok=True, parents=True)
+        tmp_path = self.path.with_suffix(f"{self.path.suffix}.tmp")
+        tmp_path.write_bytes(pickle.dumps(compiled))
+        os.replace(tmp_path, self.path)
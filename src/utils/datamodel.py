@@ -62,11 +62,39 @@ class IMUData(Telemetry, table=True):
     gx: float
     gy: float
     gz: float
-    a: float
+    a: float  # Norm of the acceleration (mean over the FIFO batch)
     temperature: float
     in_motion: bool
 
 
+class VibrationData(Telemetry, table=True):
+    rate: float  # Sample rate in Hz
+    samples: int
+    rms_x: float
+    rms_y: float
+    rms_z: float
+    peak_x: float
+    peak_y: float
+    peak_z: float
+    frequency_x: float
+    frequency_y: float
+    frequency_z: float
+    band_power: str  # JSON {"bands": [[low, high], ...], "x": [...], "y": [...], "z": [...]}
+
+
+class WaveformData(Telemetry, table=True):
+    # One block of samples of a stream (time: first sample). Samples are stored in `data` (BLOB) or in `file_name` (.npy)
+    stream: str
+    end_time: float  # Time after the last sample (time + samples / rate)
+    rate: float  # Hz
+    samples: int
+    channels: int
+    dtype: str  # float32 or int16 (value = int16 * scale)
+    scale: Optional[float] = None
+    data: Optional[bytes] = None
+    file_name: Optional[str] = None
+
+
 class PWMData(Telemetry, table=True):
     duty_cycle: float
 
@@ -83,3 +111,8 @@ class CameraData(Telemetry, table=True):
     green: Optional[float] = None
     brightness: Optional[float] = None
     video_duration: Optional[float] = None
+
+
+class SchedulerStatsData(Telemetry, table=True):
+    updates_per_second: float
+    module_stats: str  # JSON {module: {"lateness_p50": ..., "duration_p50": ..., ...}}
@@ -0,0 +1,86 @@
+import bisect
+import time
+from collections import deque
+from threading import Lock
+from typing import Optional, Sequence, Union
+
+# Bucket upper edges in seconds: 0.1 ms ... ~3.7 hours, four buckets per doubling (~19% wide)
+DEFAULT_EDGES = tuple(1e-4 * 2 ** (i / 4) for i in range(4 * 27 + 1))
+
+
+class _Slot:
+    __slots__ = ("index", "counts", "count", "max")
+
+    def __init__(self, index: int, n_buckets: int):
+        self.index = index
+        self.counts = [0] * n_buckets
+        self.count = 0
+        self.max: Optional[float] = None
+
+
+class RollingHistogram:
+    """
+    Histogram with fixed buckets over a rolling time window.
+    The window is split into `slots` sub-windows, so recording a value is a bisect plus an increment and old values
+    are dropped slot-wise. Percentiles are interpolated linearly within their bucket (capped by the maximum).
+    """
+
+    def __init__(self, edges: Sequence[float] = DEFAULT_EDGES, window: float = 300, slots: int = 5):
+        self.edges = tuple(edges)
+        self.window = window
+        self.n_slots = slots
+        self._slot_duration = window / slots
+        self._slots: deque[_Slot] = deque()
+        self._lock = Lock()
+
+    @classmethod
+    def for_period(cls, period: float, periods: int = 20, min_window: float = 300, **kwargs) -> "RollingHistogram":
+        """ Histogram whose window holds at least `periods` values recorded every `period` seconds (e.g. updates) """
+        return cls(window=max(min_window, periods * period), **kwargs)
+
+    def record(self, value: float):
+        bucket = bisect.bisect_left(self.edges, value)  # Values above the last edge go into an overflow bucket
+        with self._lock:
+            slot = self._current_slot()
+            slot.counts[bucket] += 1
+            slot.count += 1
+            if slot.max is None or value > slot.max:
+                slot.max = value
+
+    def _current_slot(self) -> _Slot:
+        index = int(time.monotonic() // self._slot_duration)
+        self._drop_old_slots(index)
+        if len(self._slots) == 0 or self._slots[-1].index != index:
+            self._slots.append(_Slot(index, len(self.edges) + 1))
+        return self._slots[-1]
+
+    def _drop_old_slots(self, index: int):
+        while len(self._slots) > 0 and self._slots[0].index <= index - self.n_slots:
+            self._slots.popleft()
+
+    def summary(self, percentiles: Sequence[float] = (50, 95, 99)) -> dict[str, Optional[Union[int, float]]]:
+        with self._lock:
+            self._drop_old_slots(int(time.monotonic() // self._slot_duration))
+            counts = [sum(column) for column in zip(*(slot.counts for slot in self._slots))]
+            total = sum(slot.count for slot in self._slots)
+            maxima = [slot.max for slot in self._slots if slot.max is not None]
+        maximum = max(maxima) if len(maxima) > 0 else None
+
+        res: dict[str, Optional[Union[int, float]]] = {"count": total}
+        for p in percentiles:
+            res[f"p{p:g}"] = self._percentile(counts, total, maximum, p)
+        res["max"] = maximum
+        return res
+
+    def _percentile(self, counts: list[int], total: int, maximum: Optional[float], p: float) -> Optional[float]:
+        if total == 0:
+            return None
+        rank = p / 100 * total
+        cumulative = 0
+        for bucket, count in enumerate(counts):
+            cumulative += count
+            if cumulative >= rank and count > 0:
+                upper = maximum if bucket == len(self.edges) else min(self.edges[bucket], maximum)
+                lower = min(self.edges[bucket - 1], upper) if bucket > 0 else 0.
+                return lower + (upper - lower) * (rank - (cumulative - count)) / count
+        return maximum
@@ -1,9 +1,12 @@
 import logging
 
+from hydra.utils import instantiate, get_method
+from omegaconf import DictConfig
 from sqlalchemy.engine import Engine
 from sqlmodel import create_engine
 
 from modules import GKBaseModule
+from utils.profiler import profiler
 
 
 def build_modules_list(**kwargs) -> list[GKBaseModule]:
@@ -25,6 +28,17 @@ def build_modules_list(**kwargs) -> list[GKBaseModule]:
     return modules
 
 
+def instantiate_modules(cfg: DictConfig) -> list[GKBaseModule]:
+    """ Instantiates every module of `cfg.modules` separately, so the constructor of each module gets profiled """
+    modules = {}
+    for name, module_cfg in cfg.modules.items():
+        if name == "_target_":
+            continue
+        with profiler.phase(f"construct:{name}"):
+            modules[name] = instantiate(module_cfg)
+    return get_method(cfg.modules._target_)(**modules)
+
+
 def create_database_engine(url, **kwargs) -> Engine:
     filtered_kwargs = {}
     for kwarg in kwargs:
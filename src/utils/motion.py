@@ -0,0 +1,73 @@
+import math
+
+import numpy as np
+
+from utils.motion_channel import MotionFeatures
+
+
+class MotionDetector:
+    """
+    Detects motion from acceleration samples (shape (n, 3)) in one vectorized pass per batch.
+    The latest `window` samples are kept in a ring buffer. In motion if
+    - the standard deviation of the acceleration vector in the window exceeds `std_threshold` (sustained motion),
+      only tested once the window holds `min_std_samples` samples (the deviation of few samples is dominated by a
+      single step, e.g. half the change for two samples),
+    - the acceleration of consecutive samples changes by more than `jerk_threshold` (onset of motion), or
+    - the total acceleration reaches `shock_threshold` (shock)
+    """
+
+    def __init__(
+            self,
+            window: int,
+            jerk_threshold: float,
+            std_threshold: float,
+            shock_threshold: float = 30,
+            min_std_samples: int = 8,
+    ):
+        self.window = max(window, 2)
+        self.jerk_threshold = jerk_threshold
+        self.std_threshold = std_threshold
+        self.shock_threshold = shock_threshold
+        self.min_std_samples = min_std_samples
+
+        self._buffer = np.zeros((self.window, 3), dtype=np.float32)
+        self._index = 0
+        self._count = 0
+
+    @classmethod
+    def for_rate(cls, duration: float, rate: float, min_std_samples: int = 8, **kwargs) -> "MotionDetector":
+        """
+        Detector with a window of `duration` seconds at a sample rate of `rate` Hz. The window holds at least
+        `min_std_samples` samples, otherwise the standard deviation would never be tested at low rates
+        """
+        window = max(math.ceil(duration * rate), min_std_samples)
+        return cls(window, min_std_samples=min_std_samples, **kwargs)
+
+    def update(self, samples: np.ndarray) -> MotionFeatures:
+        samples = np.asarray(samples, dtype=np.float32).reshape(-1, 3)
+        n = len(samples)
+        if n == 0:
+            return MotionFeatures(False, 0., 0., 0.)
+
+        # Jerk including the step from the previous batch
+        if self._count > 0:
+            previous = self._buffer[(self._index - 1) % self.window]
+            steps = np.diff(samples, axis=0, prepend=previous[np.newaxis])
+        else:
+            steps = np.diff(samples, axis=0)
+        jerk = float(np.max(np.linalg.norm(steps, axis=1))) if len(steps) > 0 else 0.
+        peak = float(np.max(np.linalg.norm(samples, axis=1)))
+
+        # Append to ring buffer
+        if n >= self.window:
+            self._buffer[:] = samples[-self.window:]
+            self._index = 0
+        else:
+            self._buffer[(self._index + np.arange(n)) % self.window] = samples
+            self._index = (self._index + n) % self.window
+        self._count = min(self._count + n, self.window)
+
+        std = float(np.sqrt(np.sum(np.var(self._buffer[:self._count], axis=0))))
+        sustained = self._count >= self.min_std_samples and std > self.std_threshold
+        in_motion = sustained or jerk > self.jerk_threshold or peak >= self.shock_threshold
+        return MotionFeatures(in_motion, std, jerk, peak)
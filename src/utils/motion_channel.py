@@ -0,0 +1,71 @@
+import time
+from dataclasses import dataclass
+from threading import Lock
+from typing import Callable, Union
+
+from utils.utils import GKBase
+
+
+@dataclass(frozen=True)
+class MotionFeatures:
+    in_motion: bool
+    std: float  # Standard deviation of the acceleration vector in the window (root of the summed axis variances)
+    jerk: float  # Largest change of acceleration between consecutive new samples
+    peak: float  # Largest total acceleration of the new samples
+
+
+@dataclass(frozen=True)
+class MotionEvent:
+    time: float
+    origin: str
+    features: MotionFeatures
+
+
+class MotionChannel(GKBase):
+    """
+    Direct channel for motion events (e.g. IMU -> camera), bypassing the telemetry fan-out.
+    Subscribers are called immediately in the thread of the publisher, so they have to return quickly.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._subscribers: list[Callable[[MotionEvent], None]] = []
+        self._lock = Lock()
+
+        self.published = 0
+        self.errors = 0
+        self.max_delivery_time = 0.
+
+    def subscribe(self, callback: Callable[[MotionEvent], None]):
+        with self._lock:
+            self._subscribers.append(callback)
+
+    def unsubscribe(self, callback: Callable[[MotionEvent], None]):
+        with self._lock:
+            if callback in self._subscribers:
+                self._subscribers.remove(callback)
+
+    def publish(self, event: MotionEvent):
+        with self._lock:
+            subscribers = list(self._subscribers)
+            self.published += 1
+
+        start = time.perf_counter()
+        for callback in subscribers:
+            try:
+                callback(event)
+            except BaseException as e:
+                with self._lock:
+                    self.errors += 1
+                self.logger.error(f"Error in motion subscriber {callback} ({e})")
+        with self._lock:
+            self.max_delivery_time = max(self.max_delivery_time, time.perf_counter() - start)
+
+    def status_dict(self) -> dict[str, Union[int, float]]:
+        with self._lock:
+            return {
+                "subscribers": len(self._subscribers),
+                "published": self.published,
+                "errors": self.errors,
+                "max_delivery_time": self.max_delivery_time,
+            }
@@ -0,0 +1,114 @@
+import time
+from concurrent.futures import ThreadPoolExecutor, Future, wait, FIRST_COMPLETED
+from dataclasses import dataclass
+from threading import Lock
+from typing import Callable, Mapping, Optional, Sequence
+
+from modules import GKBaseModule
+
+
+@dataclass
+class SetupResult:
+    success: bool
+    start: float = 0.  # Seconds after start of setup
+    duration: float = 0.
+    error: Optional[str] = None
+
+
+def resolve_dependencies(
+        modules: Sequence[GKBaseModule],
+        dependencies: Optional[Mapping[str, Sequence[str]]] = None,
+) -> dict[str, set[str]]:
+    """
+    Returns setup dependencies per module name. Dependencies from `dependencies` (e.g. config) override the
+    dependencies declared by the module (`setup_dependencies`). Dependencies on unknown modules are ignored.
+
+    :raise ValueError if the dependencies contain a cycle
+    """
+    dependencies = dependencies or {}
+    names = {module.__name__ for module in modules}
+    resolved = {}
+    for module in modules:
+        module_dependencies = set(dependencies.get(module.__name__, module.setup_dependencies))
+        unknown = module_dependencies - names
+        if len(unknown) > 0:
+            module.logger.warning(f"Ignoring unknown setup dependencies: {unknown}")
+        resolved[module.__name__] = module_dependencies & names
+
+    # Detect cycles (Kahn's algorithm)
+    remaining = {name: set(deps) for name, deps in resolved.items()}
+    while len(remaining) > 0:
+        ready = [name for name, deps in remaining.items() if len(deps) == 0]
+        if len(ready) == 0:
+            raise ValueError(f"Cyclic setup dependencies between: {sorted(remaining)}")
+        for name in ready:
+            remaining.pop(name)
+        for deps in remaining.values():
+            deps.difference_update(ready)
+
+    return resolved
+
+
+def run_setup(
+        modules: Sequence[GKBaseModule],
+        setup: Callable[[GKBaseModule], None],
+        workers: int = 1,
+        dependencies: Optional[Mapping[str, Sequence[str]]] = None,
+) -> dict[str, SetupResult]:
+    """
+    Runs `setup` for all modules with up to `workers` setups in parallel.
+    - A module is set up after all its dependencies. If a dependency failed, the module is not set up.
+    - Modules sharing a resource (`setup_resources`, e.g. an i2c address or the camera) are never set up concurrently.
+    With one worker, modules are set up one after another in the given order (respecting dependencies).
+    """
+    resolved = resolve_dependencies(modules, dependencies)
+    modules_by_name = {module.__name__: module for module in modules}
+    resource_locks: dict[str, Lock] = {}
+    for module in modules:
+        for resource in module.setup_resources:
+            resource_locks.setdefault(resource, Lock())
+
+    start = time.perf_counter()
+
+    def run_one(module: GKBaseModule) -> SetupResult:
+        locks = [resource_locks[resource] for resource in sorted(set(module.setup_resources))]
+        for lock in locks:
+            lock.acquire()
+        try:
+            t1 = time.perf_counter()
+            try:
+                setup(module)
+                return SetupResult(success=True, start=t1 - start, duration=time.perf_counter() - t1)
+            except BaseException as e:
+                return SetupResult(success=False, start=t1 - start, duration=time.perf_counter() - t1, error=str(e))
+        finally:
+            for lock in reversed(locks):
+                lock.release()
+
+    results: dict[str, SetupResult] = {}
+    pending = [module.__name__ for module in modules]
+    running: dict[Future, str] = {}
+    with ThreadPoolExecutor(max_workers=max(workers, 1), thread_name_prefix="Setup") as executor:
+        while len(pending) > 0 or len(running) > 0:
+            # Start all modules whose dependencies are finished
+            started = True
+            while started:
+                started = False
+                for name in list(pending):
+                    if not resolved[name] <= results.keys():
+                        continue
+                    pending.remove(name)
+                    started = True
+                    failed = [dependency for dependency in resolved[name] if not results[dependency].success]
+                    if len(failed) > 0:
+                        results[name] = SetupResult(success=False, error=f"Dependencies failed: {failed}")
+                    else:
+                        running[executor.submit(run_one, modules_by_name[name])] = name
+
+            if len(running) == 0:
+                continue
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                results[running.pop(future)] = future.result()
+
+    return results
@@ -0,0 +1,67 @@
+import json
+import os
+import sys
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from threading import Lock, current_thread
+from typing import Optional, Union
+
+PROFILE_ENV = "GK_PROFILE_STARTUP"  # Path of the JSON report. Startup profiling is deactivated if not set
+
+
+class StartupProfiler:
+    """
+    Records the duration of the startup phases (imports, hydra, module constructors, setups, ...).
+    Phases may be recorded from multiple threads (e.g. parallel module setups) and may be nested.
+    All times are in seconds relative to the creation of the profiler (first import).
+    """
+
+    def __init__(self):
+        self.origin = time.perf_counter()
+        self.last_end = self.origin
+        self.phases: list[dict[str, Union[str, float]]] = []
+        self._lock = Lock()
+
+    @contextmanager
+    def phase(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, start, time.perf_counter())
+
+    def record(self, name: str, start: float, end: float):
+        """ Adds phase `name` from `start` to `end` (time.perf_counter) """
+        with self._lock:
+            self.phases.append({
+                "name": name,
+                "start": start - self.origin,
+                "duration": end - start,
+                "thread": current_thread().name,
+            })
+            self.last_end = max(self.last_end, end)
+
+    def report(self) -> dict:
+        with self._lock:
+            phases = list(self.phases)
+        return {
+            "python": sys.version,
+            "pid": os.getpid(),
+            "total": time.perf_counter() - self.origin,
+            "phases": phases,
+        }
+
+    def write(self, path: Optional[str] = None) -> Optional[Path]:
+        """ Writes the report to `path` (default: environment variable GK_PROFILE_STARTUP) if set """
+        path = path or os.environ.get(PROFILE_ENV)
+        if not path:
+            return None
+
+        path = Path(path)
+        path.parent.mkdir(exist_ok=True, parents=True)
+        path.write_text(json.dumps(self.report(), indent=2))
+        return path
+
+
+profiler = StartupProfiler()
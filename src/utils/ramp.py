@@ -0,0 +1,114 @@
+import math
+from threading import Thread, Event
+from typing import Optional, Callable
+
+from utils.utils import GKBase, get_time
+
+RAMP_TABLE_SIZE = 1024  # Values per ramp. A ramp changes its output at most this many times
+
+
+def _sigmoid(x: float, steepness: float = 10) -> float:
+    # Logistic function normalized to 0 at x=0 and 1 at x=1
+    low = 1 / (1 + math.exp(steepness / 2))
+    high = 1 / (1 + math.exp(-steepness / 2))
+    return (1 / (1 + math.exp(-steepness * (x - 0.5))) - low) / (high - low)
+
+
+RAMP_CURVES: dict[str, Callable[[float], float]] = {
+    "linear": lambda x: x,
+    "sigmoid": _sigmoid,
+}
+
+
+def ramp_table(start: float, end: float, curve: str = "linear", size: int = RAMP_TABLE_SIZE) -> list[float]:
+    """ Lookup table with `size` values from `start` to `end` following `curve` """
+    if curve not in RAMP_CURVES:
+        raise ValueError(f"Unknown ramp curve `{curve}` (Choose from {list(RAMP_CURVES)})")
+    shape = RAMP_CURVES[curve]
+    return [start + (end - start) * shape(i / (size - 1)) for i in range(size)]
+
+
+def lookup(table: list[float], fraction: float) -> float:
+    """ Value of `table` at `fraction` (0..1) of the ramp """
+    index = min(max(int(fraction * len(table)), 0), len(table) - 1)
+    return table[index]
+
+
+class RampDriver(GKBase):
+    """
+    Thread writing the output of ramps at a fixed `rate` (Hz), so smooth transitions do not depend on the update
+    frequency of the module or block the update loop.
+    - `ramp_at(t)` returns the current value during a ramp, otherwise None
+    - `next_ramp_time(t)` returns the time the next ramp may start (the driver sleeps until then)
+    - `apply(value)` writes the value (e.g. PWM duty cycle). Only called if the value changed
+    """
+
+    def __init__(
+            self,
+            name: str,
+            ramp_at: Callable[[float], Optional[float]],
+            next_ramp_time: Callable[[float], float],
+            apply: Callable[[float], None],
+            rate: float = 20,
+    ):
+        super().__init__()
+        self.name = name
+        self.ramp_at = ramp_at
+        self.next_ramp_time = next_ramp_time
+        self.apply = apply
+        self.rate = rate
+
+        self.writes = 0
+        self.last_value: Optional[float] = None
+        self._thread: Optional[Thread] = None
+        self._stop = Event()
+        self._wakeup = Event()
+
+    def start(self):
+        self._stop.clear()
+        self._thread = Thread(target=self._run, name=f"Ramp-{self.name}", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None):
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._wakeup.set()
+        self._thread.join(timeout)
+        self._thread = None
+
+    def wakeup(self):
+        """ Re-evaluates the ramps immediately (e.g. after the timeline changed) """
+        self._wakeup.set()
+
+    def write(self, value: float):
+        if value == self.last_value:
+            return
+        self.apply(value)
+        self.last_value = value
+        self.writes += 1
+
+    def play(self, table: list[float], duration: float):
+        """ Writes the ramp `table` over `duration` seconds in the calling thread (e.g. for tests) """
+        start = get_time()
+        while (elapsed := get_time() - start) < duration:
+            self.write(lookup(table, elapsed / duration))
+            self._stop.wait(1 / self.rate)
+        self.write(table[-1])
+
+    def _run(self):
+        while not self._stop.is_set():
+            t = get_time()
+            try:
+                value = self.ramp_at(t)
+                if value is not None:
+                    self.write(value)
+                    timeout = 1 / self.rate
+                else:
+                    timeout = self.next_ramp_time(t) - t
+            except BaseException as e:
+                self.logger.error(f"Error in ramp driver of {self.name} ({e})")
+                timeout = 1
+
+            self._wakeup.wait(max(timeout, 0))
+            self._wakeup.clear()
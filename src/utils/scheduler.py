@@ -0,0 +1,141 @@
+import heapq
+from collections import defaultdict
+from threading import Event, Lock, TIMEOUT_MAX
+from typing import Iterable, Optional, Mapping
+
+from modules import GKBaseModule
+
+
+class DeadlineScheduler:
+    """
+    Keeps a heap of the next due time of every module, so the update loop only wakes up when a module is due
+    (or when it gets woken up explicitly, e.g. by a telecommand or SIGTERM).
+    Disabled modules are left out until the next `request_reschedule` (e.g. after they got enabled) and modules whose
+    update is still running in a worker are left out until the worker calls `resume`, so neither causes wakeups.
+    All times are monotonic (see utils.utils.get_monotonic_time).
+    """
+
+    def __init__(self, modules: Iterable[GKBaseModule], min_interval: float = 0):
+        self.min_interval = min_interval or 0
+        self._modules = list(modules)
+        self._indices = {id(module): index for index, module in enumerate(self._modules)}
+        self._heap: list[tuple[float, int, GKBaseModule]] = []
+        self._scheduled: set[int] = set()  # Indices of the modules in the heap
+        self._resumed: list[GKBaseModule] = []
+        self._lock = Lock()
+        self._wakeup = Event()
+        self._reschedule = False
+        self._rebuild()
+
+    def _rebuild(self):
+        self._heap = [
+            (module.next_execution_time(), index, module) for index, module in enumerate(self._modules)
+            if module.is_enabled
+        ]
+        heapq.heapify(self._heap)
+        self._scheduled = {index for _, index, _ in self._heap}
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    @property
+    def next_deadline(self) -> float:
+        if len(self._heap) == 0:
+            return float("inf")
+        return self._heap[0][0]
+
+    def pop_due(self, now: float) -> list[tuple[int, GKBaseModule]]:
+        """ Removes and returns all modules which are due at time `now` ordered by (due time, module index) """
+        if self._reschedule:
+            self._reschedule = False
+            self._rebuild()
+        with self._lock:
+            resumed, self._resumed = self._resumed, []
+        for module in resumed:
+            self.push(self._indices[id(module)], module, now)
+
+        due = []
+        while len(self._heap) > 0 and self._heap[0][0] <= now:
+            _, index, module = heapq.heappop(self._heap)
+            self._scheduled.discard(index)
+            due.append((index, module))
+        return due
+
+    def push(self, index: int, module: GKBaseModule, now: float):
+        """
+        Schedules the next execution of a module, which was dispatched at time `now`.
+        The next execution is at least `min_interval` seconds in the future, so modules that did not update do not
+        cause a busy loop. Disabled modules are not scheduled.
+        """
+        if not module.is_enabled or index in self._scheduled:
+            return
+        due = max(module.next_execution_time(), now + self.min_interval)
+        heapq.heappush(self._heap, (due, index, module))
+        self._scheduled.add(index)
+
+    def resume(self, module: GKBaseModule):
+        """
+        Schedules a module again after its update finished in a worker thread (instead of `push` by the update loop).
+        Can be called from any thread.
+        """
+        with self._lock:
+            self._resumed.append(module)
+        self.wakeup()
+
+    def request_reschedule(self):
+        """
+        Rebuilds the heap from the current due times of all modules before the next `pop_due` (e.g. after a module
+        changed its update frequency). Can be called from any thread.
+        """
+        self._reschedule = True
+        self.wakeup()
+
+    def wait(self, timeout: Optional[float]) -> bool:
+        """
+        Sleeps until `timeout` seconds passed or `wakeup` got called.
+        Sleeps until `wakeup` if `timeout` is None or infinite (e.g. `next_deadline` without modules).
+
+        :return True if woken up by `wakeup`, otherwise False
+        """
+        if timeout is not None and timeout >= TIMEOUT_MAX:
+            timeout = None
+        woken_up = self._wakeup.wait(None if timeout is None else max(timeout, 0))
+        self._wakeup.clear()
+        return woken_up
+
+    def wakeup(self):
+        self._wakeup.set()
+
+
+def assign_phase_offsets(
+        modules: Iterable[GKBaseModule],
+        now: float,
+        offsets: Optional[Mapping[str, float]] = None,
+        stagger: bool = True,
+) -> dict[str, float]:
+    """
+    Sets the first update of every module to `now + phase offset` (monotonic time).
+    Modules with an explicit offset in `offsets` use this offset. If `stagger` is activated, the remaining modules
+    sharing the same update frequency are spread evenly over their period, so they do not all access the bus at once.
+
+    :return Phase offset per module name
+    """
+    offsets = offsets or {}
+    groups: dict[float, list[GKBaseModule]] = defaultdict(list)
+    phases = {}
+    for module in modules:
+        if module.__name__ in offsets:
+            phases[module.__name__] = float(offsets[module.__name__])
+            module.set_phase(now, phases[module.__name__])
+        elif stagger:
+            groups[module.update_frequency].append(module)
+        else:
+            phases[module.__name__] = 0.
+            module.set_phase(now, 0.)
+
+    for update_frequency, group in groups.items():
+        for i, module in enumerate(group):
+            phases[module.__name__] = i * update_frequency / len(group)
+            module.set_phase(now, phases[module.__name__])
+
+    return phases
@@ -0,0 +1,200 @@
+import time
+from queue import Queue, Full, Empty
+from threading import Thread, Lock
+from typing import Optional, Union, Mapping, Iterable
+
+from modules import GKBaseModule
+from utils.datatypes import TelemetryType
+from utils.telemetry_routing import TelemetryRouter, is_sink
+from utils.utils import GKBase
+
+POLICIES = ("drop_oldest", "drop_newest", "block")
+
+
+class Subscription(GKBase):
+    """
+    Bounded queue and consumer thread for a single sink module.
+
+    Policies if the queue is full:
+    - `drop_oldest`: Discard the oldest queued message
+    - `drop_newest`: Discard the new message
+    - `block`: Wait up to `block_timeout` seconds for space, then discard the new message
+    """
+
+    def __init__(self, module: GKBaseModule, queue_size: int, policy: str, block_timeout: float = 5):
+        super().__init__()
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown telemetry policy `{policy}` for {module.__name__} (Choose from {POLICIES})")
+        self.module = module
+        self.queue_size = queue_size
+        self.policy = policy
+        self.block_timeout = block_timeout
+
+        self._queue: Queue[Optional[tuple]] = Queue(maxsize=queue_size)
+        self._thread: Optional[Thread] = None
+        self._lock = Lock()
+
+        # Statistics
+        self.stats = {
+            "published": 0,
+            "delivered": 0,
+            "dropped": 0,
+            "errors": 0,
+            "last_lag": 0.,
+            "max_lag": 0.,
+            "total_lag": 0.,
+            "max_queue_depth": 0,
+        }
+
+    def start(self):
+        self._thread = Thread(target=self._consume, name=f"Telemetry-{self.module.__name__}", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None):
+        if self._thread is None:
+            return
+        self._put(None, force=True)
+        self._thread.join(timeout)
+        self._thread = None
+
+    def publish(self, message: tuple):
+        with self._lock:
+            self.stats["published"] += 1
+        if self._put((time.perf_counter(), *message)):
+            with self._lock:
+                self.stats["max_queue_depth"] = max(self.stats["max_queue_depth"], self._queue.qsize())
+
+    def _put(self, item: Optional[tuple], force: bool = False) -> bool:
+        policy = "drop_oldest" if force else self.policy
+        try:
+            if policy == "block":
+                self._queue.put(item, timeout=self.block_timeout)
+            else:
+                self._queue.put_nowait(item)
+            return True
+        except Full:
+            pass
+
+        if policy == "drop_oldest":
+            # Make space by discarding the oldest message
+            try:
+                self._queue.get_nowait()
+                self._count_drop()
+            except Empty:
+                pass
+            try:
+                self._queue.put_nowait(item)
+                return True
+            except Full:
+                pass
+
+        self._count_drop()
+        return False
+
+    def _count_drop(self):
+        with self._lock:
+            self.stats["dropped"] += 1
+            dropped = self.stats["dropped"]
+        if dropped == 1 or dropped % 100 == 0:
+            self.logger.warning(f"Telemetry queue of `{self.module.__name__}` full. Dropped {dropped} messages.")
+
+    def _consume(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+
+            publish_time, kind, *args = item
+            lag = time.perf_counter() - publish_time
+            with self._lock:
+                self.stats["last_lag"] = lag
+                self.stats["max_lag"] = max(self.stats["max_lag"], lag)
+                self.stats["total_lag"] += lag
+
+            if not self.module.is_enabled:
+                continue
+            try:
+                if kind == "telemetry":
+                    data, origin = args
+                    self.module.log_telemetry(data, origin=origin)
+                elif kind == "waveform":
+                    stream, samples, rate, start_time, origin = args
+                    self.module.log_waveform(stream, samples, rate, start_time, origin=origin)
+                else:
+                    name, data, origin = args
+                    self.module.log_media(name, data, origin=origin)
+                with self._lock:
+                    self.stats["delivered"] += 1
+            except BaseException as e:
+                with self._lock:
+                    self.stats["errors"] += 1
+                self.logger.error(f"Error while logging {kind} to {self.module} (Exception={e})")
+
+    def status_dict(self) -> dict[str, Union[str, int, float, bool]]:
+        with self._lock:
+            res = dict(self.stats)
+        res["mean_lag"] = res["total_lag"] / max(res["published"] - res["dropped"] - self._queue.qsize(), 1)
+        res["queue_depth"] = self._queue.qsize()
+        res["queue_size"] = self.queue_size
+        res["policy"] = self.policy
+        return res
+
+
+class TelemetryBus(GKBase):
+    """
+    Publish/subscribe bus for telemetry, media and waveforms.
+    Every sink module gets its own bounded queue and consumer thread, so a slow sink (e.g. a database commit or an
+    HTTP request) does not delay the producing module or the other sinks.
+    """
+
+    def __init__(
+            self,
+            modules: Iterable[GKBaseModule],
+            router: TelemetryRouter,
+            queue_size: int = 256,
+            policy: str = "drop_oldest",
+            sink_policies: Optional[Mapping[str, str]] = None,
+    ):
+        super().__init__()
+        sink_policies = sink_policies or {}
+        self.router = router
+        self.subscriptions: dict[str, Subscription] = {}
+        for module in modules:
+            if not is_sink(module):
+                continue
+            self.subscriptions[module.__name__] = Subscription(
+                module,
+                queue_size=queue_size,
+                policy=sink_policies.get(module.__name__, policy),
+            )
+        self.logger.debug(f"Telemetry sinks: {list(self.subscriptions)}")
+
+    def start(self):
+        for subscription in self.subscriptions.values():
+            subscription.start()
+
+    def stop(self, timeout: Optional[float] = None):
+        for subscription in self.subscriptions.values():
+            subscription.stop(timeout)
+
+    def publish_telemetry(self, data: TelemetryType, origin: GKBaseModule):
+        for sink, sink_data in self.router.route(data, origin):
+            self.subscriptions[sink.__name__].publish(("telemetry", sink_data, origin))
+
+    def publish_media(self, name: str, data: bytes, origin: GKBaseModule):
+        for sink in self.router.route_media(origin):
+            self.subscriptions[sink.__name__].publish(("media", name, data, origin))
+
+    def publish_waveform(
+            self,
+            stream: str,
+            samples: "np.ndarray",
+            rate: float,
+            start_time: float,
+            origin: GKBaseModule,
+    ):
+        for sink in self.router.route_waveform(origin):
+            self.subscriptions[sink.__name__].publish(("waveform", stream, samples, rate, start_time, origin))
+
+    def status_dict(self) -> dict[str, Union[str, int, float, bool]]:
+        return {name: subscription.status_dict() for name, subscription in self.subscriptions.items()}  # noqa
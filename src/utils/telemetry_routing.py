@@ -0,0 +1,111 @@
+from dataclasses import dataclass
+from typing import Optional, Mapping, Iterable, Sequence
+
+from modules import GKBaseModule
+from utils.datatypes import TelemetryType
+
+ROUTE_KEYS = ("origins", "fields", "exclude_fields")
+
+
+def is_telemetry_sink(module: GKBaseModule) -> bool:
+    return type(module).log_telemetry is not GKBaseModule.log_telemetry
+
+
+def is_media_sink(module: GKBaseModule) -> bool:
+    return type(module).log_media is not GKBaseModule.log_media
+
+
+def is_waveform_sink(module: GKBaseModule) -> bool:
+    return type(module).log_waveform is not GKBaseModule.log_waveform
+
+
+def is_sink(module: GKBaseModule) -> bool:
+    """ Module overrides `log_telemetry`, `log_media` or `log_waveform` """
+    return is_telemetry_sink(module) or is_media_sink(module) or is_waveform_sink(module)
+
+
+@dataclass(frozen=True)
+class Projection:
+    fields: Optional[frozenset[str]] = None  # None: all fields
+    exclude_fields: frozenset[str] = frozenset()
+
+    def __call__(self, data: TelemetryType) -> TelemetryType:
+        # `time` is always delivered
+        if self.fields is not None:
+            return {key: value for key, value in data.items() if key in self.fields or key == "time"}
+        if len(self.exclude_fields) > 0:
+            return {key: value for key, value in data.items() if key not in self.exclude_fields or key == "time"}
+        return dict(data)
+
+
+class TelemetryRouter:
+    """
+    Routing table origin -> [(sink, projection)].
+    Sinks declare which origins and fields they consume with `telemetry_origins`, `telemetry_fields` and
+    `telemetry_exclude_fields` (None: everything). These can be overwritten per sink with `routes` (e.g. from config):
+        {"tango": {"origins": [...], "fields": [...], "exclude_fields": [...]}}
+    Every sink receives its own (projected) copy of the data.
+    """
+
+    def __init__(
+            self,
+            modules: Iterable[GKBaseModule],
+            routes: Optional[Mapping[str, Mapping[str, Sequence[str]]]] = None,
+            origins: Iterable[str] = (),
+    ):
+        modules = list(modules)
+        self.telemetry_sinks = [module for module in modules if is_telemetry_sink(module)]
+        self.media_sinks = [module for module in modules if is_media_sink(module)]
+        self.waveform_sinks = [module for module in modules if is_waveform_sink(module)]
+
+        self._origins: dict[str, Optional[frozenset[str]]] = {}
+        self._projections: dict[str, Projection] = {}
+        routes = routes or {}
+        for sink in self.telemetry_sinks:
+            route = dict(routes.get(sink.__name__, {}))
+            unknown_keys = set(route) - set(ROUTE_KEYS)
+            if len(unknown_keys) > 0:
+                raise ValueError(f"Unknown telemetry route keys for `{sink.__name__}`: {unknown_keys} ({ROUTE_KEYS})")
+
+            sink_origins = route.get("origins", sink.telemetry_origins)
+            fields = route.get("fields", sink.telemetry_fields)
+            exclude_fields = route.get("exclude_fields", sink.telemetry_exclude_fields)
+            self._origins[sink.__name__] = None if sink_origins is None else frozenset(sink_origins)
+            self._projections[sink.__name__] = Projection(
+                fields=None if fields is None else frozenset(fields),
+                exclude_fields=frozenset(exclude_fields or ()),
+            )
+
+        # Precompile table for known origins
+        self._table: dict[str, list[tuple[GKBaseModule, Projection]]] = {}
+        for origin in [*(module.__name__ for module in modules), *origins]:
+            self._compile(origin)
+
+    def _compile(self, origin: str) -> list[tuple[GKBaseModule, Projection]]:
+        route = []
+        for sink in self.telemetry_sinks:
+            sink_origins = self._origins[sink.__name__]
+            if sink.__name__ == origin or (sink_origins is not None and origin not in sink_origins):
+                continue
+            route.append((sink, self._projections[sink.__name__]))
+        self._table[origin] = route
+        return route
+
+    def route(self, data: TelemetryType, origin: GKBaseModule) -> list[tuple[GKBaseModule, TelemetryType]]:
+        """ Returns enabled sinks for data from `origin` with their projected copy of `data` """
+        route = self._table.get(origin.__name__)
+        if route is None:
+            route = self._compile(origin.__name__)
+        return [
+            (sink, projection(data)) for sink, projection in route
+            if sink.is_enabled and (projection.fields is None or not projection.fields.isdisjoint(data))
+        ]
+
+    def route_media(self, origin: GKBaseModule) -> list[GKBaseModule]:
+        return [sink for sink in self.media_sinks if sink.is_enabled and sink is not origin]
+
+    def route_waveform(self, origin: GKBaseModule) -> list[GKBaseModule]:
+        return [sink for sink in self.waveform_sinks if sink.is_enabled and sink is not origin]
+
+    def status_dict(self) -> dict[str, list[str]]:
+        return {origin: [sink.__name__ for sink, _ in route] for origin, route in self._table.items()}
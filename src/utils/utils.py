@@ -4,8 +4,6 @@ import logging
 import subprocess
 import time
 
-import numpy as np
-
 
 class GKBase(abc.ABC):
     def __init__(self):
@@ -21,6 +19,11 @@ def get_time() -> float:
     return time.time()
 
 
+def get_monotonic_time() -> float:
+    # Time in seconds, not affected by system clock changes (NTP, RTC). Used for scheduling
+    return time.monotonic()
+
+
 def get_git_version() -> str:
     try:
         stdout = subprocess.run(["git", "describe"], stdout=subprocess.PIPE)
@@ -0,0 +1,39 @@
+from typing import Sequence
+
+import numpy as np
+
+
+def vibration_spectrum(
+        samples: np.ndarray,
+        rate: float,
+        bands: Sequence[tuple[float, float]],
+) -> dict[str, np.ndarray]:
+    """
+    Vibration summary per axis of `samples` (shape (n, axes)) sampled at `rate` Hz. The mean (e.g. gravity) is removed.
+
+    :return rms (axes,), peak (axes,): largest absolute deviation from the mean,
+        frequency (axes,): frequency with the highest power,
+        band_power (bands, axes): power in each frequency band [low, high) (one-sided PSD with Hann window)
+    """
+    samples = samples - samples.mean(axis=0)
+    n = len(samples)
+    window = np.hanning(n)[:, np.newaxis]
+    spectrum = np.abs(np.fft.rfft(samples * window, axis=0)) ** 2
+    psd = spectrum * 2 / (rate * np.sum(window ** 2))
+    psd[0] /= 2  # DC (and Nyquist for even n) are not mirrored
+    if n % 2 == 0:
+        psd[-1] /= 2
+    frequencies = np.fft.rfftfreq(n, 1 / rate)
+    df = rate / n
+
+    band_power = np.stack([
+        np.sum(psd[(frequencies >= low) & (frequencies < high)], axis=0) * df
+        for low, high in bands
+    ]) if len(bands) > 0 else np.zeros((0, samples.shape[1]))
+
+    return {
+        "rms": np.sqrt(np.mean(samples ** 2, axis=0)),
+        "peak": np.max(np.abs(samples), axis=0),
+        "frequency": frequencies[np.argmax(psd[1:], axis=0) + 1],
+        "band_power": band_power,
+    }
@@ -0,0 +1,146 @@
+import sys
+import time
+import traceback
+from contextlib import contextmanager
+from dataclasses import dataclass
+from threading import Thread, Lock, Event, get_ident
+from typing import Optional, Union, Mapping
+
+from modules import GKBaseModule
+from utils.utils import GKBase
+
+
+@dataclass
+class WatchEntry:
+    module: GKBaseModule
+    thread_id: int
+    start: float
+    deadline: float
+    fired: bool = False
+
+
+class Watchdog(GKBase):
+    """
+    Monitors module updates from a separate thread, so it works independent of the thread executing the update and
+    does not rely on SIGALRM.
+    Every update has a deadline (`default_timeout` or a per module override). Updates exceeding their deadline are
+    logged with their current stack and counted as overrun (again every timeout period while they keep hanging). After
+    `max_overruns` consecutive overruns the module gets disabled.
+    Threads can't be interrupted, so hanging updates are not stopped. In single thread mode the update loop stops
+    waiting for them (see utils.worker_pool.IsolatedWorker).
+    """
+
+    def __init__(
+            self,
+            default_timeout: float,
+            timeouts: Optional[Mapping[str, float]] = None,
+            max_overruns: int = 0,
+            check_interval: float = 1,
+    ):
+        super().__init__()
+        # Config
+        self.default_timeout = default_timeout
+        self.timeouts = dict(timeouts) if timeouts is not None else {}
+        self.max_overruns = max_overruns
+        self.check_interval = check_interval
+
+        # State
+        self._active: dict[str, WatchEntry] = {}
+        self._lock = Lock()
+        self._stop = Event()
+        self._thread: Optional[Thread] = None
+        self.stats: dict[str, dict[str, Union[int, float, bool]]] = {}
+
+    def start(self):
+        self._stop.clear()
+        self._thread = Thread(target=self._monitor, name="Watchdog", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(self.check_interval)
+            self._thread = None
+
+    def timeout_for(self, module: GKBaseModule) -> float:
+        return self.timeouts.get(module.__name__, self.default_timeout)
+
+    @contextmanager
+    def watch(self, module: GKBaseModule):
+        """ Watches the execution time of the wrapped block """
+        start = time.monotonic()
+        entry = WatchEntry(
+            module=module,
+            thread_id=get_ident(),
+            start=start,
+            deadline=start + self.timeout_for(module),
+        )
+        with self._lock:
+            self._active[module.__name__] = entry
+        try:
+            yield entry
+        finally:
+            end = time.monotonic()
+            with self._lock:
+                self._active.pop(module.__name__, None)
+                stats = self._module_stats(module)
+                stats["max_duration"] = max(stats["max_duration"], end - start)
+                if entry.fired or end > entry.deadline:
+                    if not entry.fired:
+                        entry.fired = True
+                        self._overrun(entry, end)
+                    self.logger.warning(f"Module `{module.__name__}` finished after {end - start:.2f}s")
+                else:
+                    stats["consecutive_overruns"] = 0
+                    stats["hung"] = False
+
+    def _monitor(self):
+        while not self._stop.wait(self.check_interval):
+            now = time.monotonic()
+            with self._lock:
+                for entry in self._active.values():
+                    if now > entry.deadline:
+                        # Updates that keep hanging count as another overrun every timeout period
+                        self._overrun(entry, now, with_stack=not entry.fired)
+                        entry.fired = True
+                        entry.deadline = now + self.timeout_for(entry.module)
+
+    def _overrun(self, entry: WatchEntry, now: float, with_stack: bool = False):
+        """ Has to be called with acquired lock """
+        module = entry.module
+        stats = self._module_stats(module)
+        stats["overruns"] += 1
+        stats["consecutive_overruns"] += 1
+        stats["hung"] = True
+
+        self.logger.error(
+            f"Module `{module.__name__}` exceeded its timeout of {self.timeout_for(module)}s "
+            f"(running for {now - entry.start:.2f}s, {stats['consecutive_overruns']} consecutive overruns)"
+        )
+        if with_stack:
+            frame = sys._current_frames().get(entry.thread_id)  # noqa
+            if frame is not None:
+                self.logger.error("".join(traceback.format_stack(frame)))
+
+        if 0 < self.max_overruns <= stats["consecutive_overruns"] and module.is_enabled:
+            module.disable()
+
+    def _module_stats(self, module: GKBaseModule) -> dict[str, Union[int, float, bool]]:
+        if module.__name__ not in self.stats:
+            self.stats[module.__name__] = {
+                "timeout": self.timeout_for(module),
+                "overruns": 0,
+                "consecutive_overruns": 0,
+                "max_duration": 0.,
+                "hung": False,
+            }
+        return self.stats[module.__name__]
+
+    def status_dict(self) -> dict[str, Union[str, int, float, bool]]:
+        with self._lock:
+            return {
+                "default_timeout": self.default_timeout,
+                "max_overruns": self.max_overruns,
+                "running": sorted(self._active),  # noqa
+                "modules": {name: dict(stats) for name, stats in self.stats.items()},  # noqa
+            }
@@ -0,0 +1,142 @@
+import math
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional, Sequence
+
+import numpy as np
+from sqlalchemy.engine import Engine
+from sqlmodel import Session, select
+
+from utils.datamodel import WaveformData
+
+WAVEFORM_DTYPES = {"float32": np.dtype("<f4"), "int16": np.dtype("<i2")}
+
+
+@dataclass
+class Waveform:
+    start_time: float
+    rate: float  # Hz
+    samples: np.ndarray  # Shape (n, channels)
+
+    @property
+    def end_time(self) -> float:
+        return self.start_time + len(self.samples) / self.rate
+
+    @property
+    def times(self) -> np.ndarray:
+        return self.start_time + np.arange(len(self.samples)) / self.rate
+
+
+class WaveformBuffer:
+    """
+    Collects the samples of one stream into blocks of `block_duration` seconds. Samples of consecutive batches are
+    assumed to be contiguous. A block is closed early if the sample rate changes or a batch starts more than
+    `gap_tolerance` seconds away from the expected time (e.g. after a FIFO overflow).
+    """
+
+    def __init__(self, block_duration: float, gap_tolerance: float = 0.5):
+        self.block_duration = block_duration
+        self.gap_tolerance = gap_tolerance
+
+        self._block: Optional[np.ndarray] = None
+        self._count = 0
+        self._rate: Optional[float] = None
+        self._start_time = 0.
+        self._next_time: Optional[float] = None  # Expected time of the next sample
+
+    def append(self, samples: np.ndarray, rate: float, start_time: float) -> list[Waveform]:
+        """ :return Completed blocks """
+        samples = np.asarray(samples).reshape(len(samples), -1)
+        blocks = []
+        contiguous = (
+                self._next_time is not None and rate == self._rate and samples.shape[1] == self._block.shape[1]
+                and abs(start_time - self._next_time) <= self.gap_tolerance
+        )
+        if contiguous:
+            start_time = self._next_time
+        elif self._count > 0:
+            blocks.append(self.flush())
+        if self._block is None or rate != self._rate or samples.shape[1] != self._block.shape[1]:
+            self._block = np.empty((max(math.ceil(self.block_duration * rate), 1), samples.shape[1]), np.float32)
+            self._rate = rate
+
+        offset = 0
+        while offset < len(samples):
+            if self._count == 0:
+                self._start_time = start_time + offset / rate
+            n = min(len(samples) - offset, len(self._block) - self._count)
+            self._block[self._count:self._count + n] = samples[offset:offset + n]
+            self._count += n
+            offset += n
+            if self._count == len(self._block):
+                blocks.append(self.flush())
+        self._next_time = start_time + len(samples) / rate
+        return blocks
+
+    def flush(self) -> Optional[Waveform]:
+        """ :return Current (incomplete) block, if not empty """
+        if self._count == 0:
+            return None
+        block = Waveform(self._start_time, self._rate, self._block[:self._count].copy())
+        self._count = 0
+        return block
+
+
+def encode_samples(samples: np.ndarray, dtype: str, scale: Optional[float] = None) -> np.ndarray:
+    """ Converts samples to `dtype`. int16 stores round(samples / scale) """
+    if dtype not in WAVEFORM_DTYPES:
+        raise ValueError(f"Unknown waveform dtype `{dtype}` (Choose from {list(WAVEFORM_DTYPES)})")
+    if dtype == "int16":
+        if scale is None:
+            raise ValueError("int16 waveforms need a scale")
+        info = np.iinfo(np.int16)
+        return np.clip(np.round(samples / scale), info.min, info.max).astype(WAVEFORM_DTYPES[dtype])
+    return samples.astype(WAVEFORM_DTYPES[dtype])
+
+
+def decode_samples(encoded: np.ndarray, scale: Optional[float] = None) -> np.ndarray:
+    if encoded.dtype == WAVEFORM_DTYPES["int16"]:
+        return encoded.astype(np.float32) * np.float32(scale)
+    return encoded.astype(np.float32, copy=False)
+
+
+def load_block(row: WaveformData) -> Waveform:
+    """ Samples of a stored block (BLOB or .npy file) """
+    if row.data is not None:
+        encoded = np.frombuffer(row.data, dtype=WAVEFORM_DTYPES[row.dtype]).reshape(row.samples, row.channels)
+    else:
+        encoded = np.load(row.file_name)
+    return Waveform(row.time, row.rate, decode_samples(encoded, row.scale))
+
+
+def read_waveform(
+        engine: Engine,
+        name: str,
+        stream: str,
+        start: Optional[float] = None,
+        end: Optional[float] = None,
+) -> list[Waveform]:
+    """
+    Reads the stored blocks of `stream` of module `name` overlapping [start, end) ordered by time, e.g.
+        waveform = read_waveform(create_database_engine("sqlite:///db.sqlite"), "imu", "acceleration")
+    """
+    with Session(engine) as session:
+        query = select(WaveformData).where(WaveformData.name == name, WaveformData.stream == stream)
+        if start is not None:
+            query = query.where(WaveformData.end_time > start)
+        if end is not None:
+            query = query.where(WaveformData.time < end)
+        rows = session.exec(query.order_by(WaveformData.time)).all()
+    return [load_block(row) for row in rows]
+
+
+def concatenate(blocks: Sequence[Waveform]) -> tuple[np.ndarray, np.ndarray]:
+    """ :return Times (n,) and samples (n, channels) of all blocks """
+    if len(blocks) == 0:
+        return np.zeros(0), np.zeros((0, 0), np.float32)
+    return np.concatenate([block.times for block in blocks]), np.concatenate([block.samples for block in blocks])
+
+
+def npy_path(folder: Path, name: str, stream: str, start_time: float) -> Path:
+    timestamp_str = f"{start_time:.3f}".replace(".", "_")
+    return folder / name / f"{stream}_{timestamp_str}.npy"
@@ -0,0 +1,193 @@
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from queue import Queue, Full
+from threading import Thread, Lock
+from typing import Callable, Optional, Union
+
+from utils.utils import GKBase
+
+
+class WorkerPool(GKBase):
+    """
+    Bounded pool of long-lived worker threads.
+    Every job has a key (e.g. the module name) and a key can only be queued or running once at a time. If the queue is
+    full, new jobs are rejected, so slow jobs apply backpressure instead of piling up threads.
+    """
+
+    def __init__(self, workers: int, max_queue_size: int = 0):
+        super().__init__()
+        if workers < 1:
+            raise ValueError(f"WorkerPool requires at least one worker. Got: {workers}")
+
+        # Config
+        self.workers = workers
+        self.max_queue_size = max_queue_size
+
+        # State
+        self._queue: Queue[Optional[tuple[str, Callable[[], None], float]]] = Queue(maxsize=max_queue_size)
+        self._threads: list[Thread] = []
+        self._pending: set[str] = set()
+        self._lock = Lock()
+        self._busy_workers = 0
+
+        # Statistics
+        self.stats = {}
+        self.reset_stats()
+
+    def start(self):
+        for i in range(self.workers):
+            thread = Thread(target=self._work, name=f"Worker-{i}", daemon=True)
+            self._threads.append(thread)
+            thread.start()
+        self.logger.debug(f"Started {self.workers} workers")
+
+    def stop(self, timeout: Optional[float] = None):
+        for _ in self._threads:
+            try:
+                self._queue.put_nowait(None)
+            except Full:
+                break
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def submit(self, key: str, job: Callable[[], None]) -> bool:
+        """
+        Queues `job` for execution.
+
+        :return True if the job got queued, False if a job with the same key is still pending or the queue is full
+        """
+        with self._lock:
+            if key in self._pending:
+                self.stats["skipped"] += 1
+                self.logger.debug(f"Job `{key}` still queued or running. Skipping.")
+                return False
+            try:
+                self._queue.put_nowait((key, job, time.perf_counter()))
+            except Full:
+                self.stats["rejected"] += 1
+                self.logger.warning(f"Worker queue full ({self.max_queue_size}). Rejecting job `{key}`.")
+                return False
+            self._pending.add(key)
+            self.stats["submitted"] += 1
+            self.stats["max_queue_depth"] = max(self.stats["max_queue_depth"], self._queue.qsize())
+        return True
+
+    def is_pending(self, key: str) -> bool:
+        return key in self._pending
+
+    def _work(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+
+            key, job, submit_time = item
+            wait_time = time.perf_counter() - submit_time
+            with self._lock:
+                self._busy_workers += 1
+                self.stats["last_wait_time"] = wait_time
+                self.stats["max_wait_time"] = max(self.stats["max_wait_time"], wait_time)
+                self.stats["total_wait_time"] += wait_time
+
+            try:
+                job()
+            except BaseException as e:
+                self.logger.error(f"Exception raised in job `{key}` ({e})")
+            finally:
+                with self._lock:
+                    self._busy_workers -= 1
+                    self._pending.discard(key)
+                    self.stats["completed"] += 1
+
+    def reset_stats(self):
+        self.stats = {
+            "submitted": 0,
+            "completed": 0,
+            "skipped": 0,
+            "rejected": 0,
+            "max_queue_depth": 0,
+            "last_wait_time": 0.,
+            "max_wait_time": 0.,
+            "total_wait_time": 0.,
+        }
+
+    def status_dict(self) -> dict[str, Union[str, int, float, bool]]:
+        with self._lock:
+            res = dict(self.stats)
+            res["mean_wait_time"] = res["total_wait_time"] / max(res["completed"] + self._busy_workers, 1)
+            res["workers"] = self.workers
+            res["busy_workers"] = self._busy_workers
+            res["queue_depth"] = self._queue.qsize()
+            res["max_queue_size"] = self.max_queue_size
+            res["pending"] = sorted(self._pending)  # noqa
+        return res
+
+
+class IsolatedWorker(GKBase):
+    """
+    Single worker thread executing one job at a time while the caller waits for it with a timeout.
+    Python threads can't be stopped, so a worker hanging in a job is abandoned (it exits once the job returns) and the
+    next job gets a fresh worker. The caller continues instead of hanging with the job.
+    """
+
+    def __init__(self, name: str = "Worker"):
+        super().__init__()
+        self.name = name
+        self._queue: Optional[Queue[Optional[tuple[Callable[[], None], Future]]]] = None
+        self._thread: Optional[Thread] = None
+
+        # Statistics
+        self.abandoned_workers = 0
+
+    def _start(self):
+        self._queue = Queue()
+        self._thread = Thread(
+            target=self._work, args=(self._queue,), name=f"{self.name}-{self.abandoned_workers}", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        if self._queue is not None:
+            self._queue.put(None)
+        self._queue = None
+        self._thread = None
+
+    def run(self, job: Callable[[], None], timeout: Optional[float]) -> Future:
+        """
+        Executes `job` in the worker and waits up to `timeout` seconds for it. If the job is still running afterwards,
+        the worker is abandoned. Exceptions of the job are stored in the returned future.
+
+        :return Future of the job, which is not done if the job timed out
+        """
+        if self._thread is None:
+            self._start()
+        future = Future()
+        self._queue.put((job, future))
+        try:
+            future.exception(timeout)
+        except FutureTimeoutError:
+            self.logger.error(f"Job still running after {timeout}s. Abandoning worker `{self._thread.name}`.")
+            self.abandoned_workers += 1
+            self.stop()
+        return future
+
+    @staticmethod
+    def _work(queue: Queue):
+        while True:
+            item = queue.get()
+            if item is None:
+                break
+
+            job, future = item
+            try:
+                job()
+                future.set_result(None)
+            except BaseException as e:
+                future.set_exception(e)
+
+    def status_dict(self) -> dict[str, Union[str, int, float, bool]]:
+        return {
+            "running": self._thread is not None and self._thread.is_alive(),
+            "abandoned_workers": self.abandoned_workers,
+        }